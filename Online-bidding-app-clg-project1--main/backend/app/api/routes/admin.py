@@ -4,12 +4,21 @@ from sqlalchemy import func
 from typing import List
 
 from app.core.database import get_db
-from app.core.security import require_role
+from app.core.security import require_role, principal_cache
 from app.models.user import User, UserRole
 from app.models.product import Product, AuctionStatus
 from app.models.bid import Bid
 from app.models.transaction import Transaction, PaymentStatus
 from app.schemas.user import UserResponse
+from app.services.auction_engine import auction_engine
+from app.services.auction_cache import auction_cache
+from app.services.websocket_manager import manager
+from app.services.bid_writer import bid_writer
+from app.services.bid_idempotency import bid_idempotency
+from app.services.password_hasher import password_hasher
+from app.services.token_revocations import token_revocations
+from app.services.auth_throttle import auth_throttle
+from app.services.auction_scheduler import auction_scheduler
 
 router = APIRouter()
 
@@ -51,6 +60,28 @@ async def get_admin_stats(
     }
 
 
+@router.get("/performance", response_model=dict)
+async def get_performance_stats(
+    current_user: User = Depends(require_role([UserRole.ADMIN]))
+):
+    """Get in-process bidding pipeline statistics (Admin only)"""
+    return {
+        "active_sequencers": len(auction_engine.sequencers),
+        "scheduled_closes": len(auction_scheduler.deadlines),
+        "auction_cache": auction_cache.stats(),
+        "principal_cache": principal_cache.stats(),
+        "token_revocations": token_revocations.stats(),
+        "password_hasher": password_hasher.stats(),
+        "auth_throttle": auth_throttle.stats(),
+        "websocket": manager.stats(),
+        "bid_writer": bid_writer.stats(),
+        "idempotency": {
+            "cached_responses": len(bid_idempotency.responses),
+            "replays": bid_idempotency.replays
+        }
+    }
+
+
 @router.get("/users", response_model=List[UserResponse])
 async def get_all_users(
     skip: int = Query(0, ge=0),
@@ -92,8 +123,14 @@ async def toggle_user_active(
         )
     
     user.is_active = not user.is_active
+    if user.is_active:
+        revocation = token_revocations.reactivate(db, user.id)
+    else:
+        revocation = token_revocations.revoke(db, user.id, "deactivated")
     db.commit()
     db.refresh(user)
+    principal_cache.invalidate(user.id)
+    token_revocations.apply(revocation)
     
     return user
 
@@ -121,7 +158,10 @@ async def delete_user(
         )
     
     db.delete(user)
+    revocation = token_revocations.revoke(db, user_id, "deleted")
     db.commit()
+    principal_cache.invalidate(user_id)
+    token_revocations.apply(revocation)
     
     return None
 
@@ -175,5 +215,7 @@ async def delete_product_admin(
     
     db.delete(product)
     db.commit()
+    auction_cache.invalidate(product_id)
+    auction_scheduler.cancel(product_id)
     
     return None
\ No newline at end of file
@@ -1,25 +1,42 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import math
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 from datetime import timedelta
 
 from app.core.database import get_db
 from app.core.security import (
-    verify_password,
-    get_password_hash,
     create_access_token,
-    get_current_active_user
+    get_current_active_user,
+    get_current_user_record
 )
 from app.core.config import settings
 from app.models.user import User, UserRole
 from app.schemas.user import UserCreate, UserLogin, UserResponse
 from app.schemas.token import Token, TokenWithUser
+from app.services.password_hasher import password_hasher, HasherBusy
+from app.services.auth_throttle import auth_throttle, RateLimited
 
 router = APIRouter()
 
 
+async def _throttle(action: str, request: Request, email: str):
+    """Reject attempts over the per-IP or per-account limit, before any hashing"""
+    try:
+        await auth_throttle.check(action, request.client.host if request.client else None, email)
+    except RateLimited as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=e.detail,
+            headers={"Retry-After": str(math.ceil(e.retry_after))}
+        )
+
+
 @router.post("/register", response_model=TokenWithUser, status_code=status.HTTP_201_CREATED)
-async def register(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register(user_data: UserCreate, request: Request, db: Session = Depends(get_db)):
     """Register a new user and return access token with user data"""
+    await _throttle("register", request, user_data.email)
+    
     # Check if user already exists
     existing_user = db.query(User).filter(User.email == user_data.email).first()
     if existing_user:
@@ -28,8 +45,15 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
             detail="Email already registered"
         )
     
-    # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    # Create new user; bcrypt runs on the hasher's threads, not the event loop
+    try:
+        hashed_password = await password_hasher.hash(user_data.password)
+    except HasherBusy as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=e.detail,
+            headers={"Retry-After": "1"}
+        )
     new_user = User(
         email=user_data.email,
         password=hashed_password,
@@ -58,12 +82,31 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
 
 
 @router.post("/login", response_model=TokenWithUser)
-async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
+async def login(user_credentials: UserLogin, request: Request, db: Session = Depends(get_db)):
     """Login user and return access token with user data"""
+    await _throttle("login", request, user_credentials.email)
+    
     # Find user by email
     user = db.query(User).filter(User.email == user_credentials.email).first()
     
-    if not user or not verify_password(user_credentials.password, user.password):
+    valid = False
+    if user and user.password:
+        try:
+            valid, new_hash = await password_hasher.verify_and_update(
+                user_credentials.password, user.password
+            )
+        except HasherBusy as e:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=e.detail,
+                headers={"Retry-After": "1"}
+            )
+        # Stored with a different cost than BCRYPT_ROUNDS: keep the rehash
+        if valid and new_hash is not None:
+            user.password = new_hash
+            db.commit()
+    
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -92,7 +135,7 @@ async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
 
 
 @router.get("/me", response_model=UserResponse)
-async def get_current_user_info(current_user: User = Depends(get_current_active_user)):
+async def get_current_user_info(current_user: User = Depends(get_current_user_record)):
     """Get current user information"""
     return current_user
 
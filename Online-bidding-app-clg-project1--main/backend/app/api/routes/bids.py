@@ -1,15 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response, Header
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
+from sqlalchemy import func, or_, and_, select
+from typing import Iterator, List, Optional
 from datetime import datetime
+import json
 
-from app.core.database import get_db
+from app.core.database import get_db, SessionLocal
 from app.core.security import get_current_active_user, require_role
 from app.models.user import User, UserRole
 from app.models.product import Product, AuctionStatus
 from app.models.bid import Bid
-from app.schemas.bid import BidCreate, BidResponse
-from app.services.websocket_manager import manager
+from app.schemas.bid import BidCreate, BidResponse, ProxyBidCreate, ProxyBidResponse
+from app.services.auction_engine import auction_engine, BidRejected
+from app.services import bid_placement
 
 router = APIRouter()
 
@@ -17,114 +21,137 @@ router = APIRouter()
 @router.post("/", response_model=BidResponse, status_code=status.HTTP_201_CREATED)
 async def place_bid(
     bid_data: BidCreate,
-    current_user: User = Depends(require_role([UserRole.BUYER, UserRole.ADMIN])),
-    db: Session = Depends(get_db)
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, max_length=255),
+    current_user: User = Depends(require_role([UserRole.BUYER, UserRole.ADMIN]))
 ):
-    """Place a bid on a product"""
-    # Get product
-    product = db.query(Product).filter(Product.id == bid_data.product_id).first()
-    
-    if not product:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Product not found"
-        )
-    
-    # Check if auction is active
-    if product.status != AuctionStatus.ACTIVE:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Auction is not active"
-        )
-    
-    # Check if auction has ended
-    if product.end_time <= datetime.utcnow():
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Auction has ended"
+    """Place a bid on a product. Retries carrying the same Idempotency-Key get the original bid back."""
+    try:
+        bid, replayed = await bid_placement.place_bid(
+            current_user.id,
+            current_user.name,
+            bid_data.product_id,
+            bid_data.amount,
+            idempotency_key
         )
+    except BidRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
     
-    # Check if user is the seller
-    if product.seller_id == current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Sellers cannot bid on their own products"
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return bid
+
+
+@router.post("/proxy", response_model=ProxyBidResponse, status_code=status.HTTP_201_CREATED)
+async def place_proxy_bid(
+    proxy_data: ProxyBidCreate,
+    current_user: User = Depends(require_role([UserRole.BUYER, UserRole.ADMIN]))
+):
+    """Register a hidden maximum bid; the engine bids on your behalf up to it"""
+    try:
+        outcome = await auction_engine.register_proxy(
+            proxy_data.product_id,
+            current_user.id,
+            current_user.name,
+            proxy_data.max_amount
         )
-    
-    # Validate bid amount
-    minimum_bid = product.current_bid + product.bid_increment
-    if bid_data.amount < minimum_bid:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Bid must be at least ₹{minimum_bid}"
+    except BidRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    
+    # A whole proxy war resolves to a single notification
+    await bid_placement.announce_outcome(outcome)
+    
+    return {
+        "product_id": proxy_data.product_id,
+        "max_amount": proxy_data.max_amount,
+        "current_bid": outcome.state.current_bid,
+        "is_leading": outcome.state.leader_id == current_user.id
+    }
+
+
+# Rows fetched per keyset page when streaming a full history
+HISTORY_STREAM_PAGE_SIZE = 1000
+
+
+def _bid_history_page(db: Session, product_id: int, after: Optional[int], limit: int) -> list:
+    """One page of bids, newest first, with buyer names joined in the same query"""
+    query = (
+        db.query(
+            Bid.id,
+            Bid.product_id,
+            Bid.buyer_id,
+            Bid.amount,
+            Bid.timestamp,
+            func.coalesce(User.name, "Unknown").label("buyer_name")
         )
-    
-    # Create new bid
-    new_bid = Bid(
-        product_id=bid_data.product_id,
-        buyer_id=current_user.id,
-        amount=bid_data.amount
+        .outerjoin(User, User.id == Bid.buyer_id)
+        .filter(Bid.product_id == product_id)
     )
     
-    # Update product current bid
-    product.current_bid = bid_data.amount
-    
-    db.add(new_bid)
-    db.commit()
-    db.refresh(new_bid)
-    
-    # Send real-time notifications
-    # Notify seller about new bid
-    await manager.notify_seller(product.seller_id, {
-        "message": f"New bid of ₹{bid_data.amount} on {product.title}",
-        "product_id": product.id,
-        "product_title": product.title,
-        "bid_amount": bid_data.amount,
-        "buyer_name": current_user.name,
-        "buyer_id": current_user.id
-    })
-    
-    # Broadcast to all watchers
-    await manager.broadcast_new_bid(product.id, {
-        "amount": bid_data.amount,
-        "buyer_name": current_user.name,
-        "product_id": product.id,
-        "bid_id": new_bid.id
-    })
+    # Keyset on (timestamp, id): resumes after the last row instead of counting an offset.
+    # The cursor is the last bid id; its timestamp is compared inside the database so
+    # stored and bound datetime formats can never disagree (SQLite keeps them as text).
+    if after is not None:
+        after_timestamp = select(Bid.timestamp).where(Bid.id == after).scalar_subquery()
+        query = query.filter(
+            or_(
+                Bid.timestamp < after_timestamp,
+                and_(Bid.timestamp == after_timestamp, Bid.id < after)
+            )
+        )
     
-    return new_bid
+    return query.order_by(Bid.timestamp.desc(), Bid.id.desc()).limit(limit).all()
+
+
+def _stream_bid_history(product_id: int, after: Optional[int]) -> Iterator[str]:
+    """Yield the whole history as NDJSON, one short keyset query per page"""
+    db = SessionLocal()
+    try:
+        while True:
+            rows = _bid_history_page(db, product_id, after, HISTORY_STREAM_PAGE_SIZE)
+            for row in rows:
+                yield json.dumps({
+                    "id": row.id,
+                    "product_id": row.product_id,
+                    "buyer_id": row.buyer_id,
+                    "amount": row.amount,
+                    "timestamp": row.timestamp.isoformat(),
+                    "buyer_name": row.buyer_name
+                }) + "\n"
+            if len(rows) < HISTORY_STREAM_PAGE_SIZE:
+                return
+            after = rows[-1].id
+    finally:
+        db.close()
 
 
 @router.get("/product/{product_id}", response_model=List[BidResponse])
 async def get_product_bids(
     product_id: int,
-    skip: int = Query(0, ge=0),
+    response: Response,
+    cursor: Optional[int] = Query(None, description="Value of X-Next-Cursor from the previous page"),
     limit: int = Query(50, ge=1, le=100),
+    format: str = Query("json", pattern="^(json|ndjson)$"),
     db: Session = Depends(get_db)
 ):
-    """Get all bids for a specific product"""
+    """Get bids for a specific product, newest first (keyset paginated or streamed as NDJSON)"""
     # Check if product exists
-    product = db.query(Product).filter(Product.id == product_id).first()
-    if not product:
+    if not db.query(Product.id).filter(Product.id == product_id).first():
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Product not found"
         )
     
-    # Get bids ordered by timestamp (newest first)
-    bids = (
-        db.query(Bid)
-        .filter(Bid.product_id == product_id)
-        .order_by(Bid.timestamp.desc())
-        .offset(skip)
-        .limit(limit)
-        .all()
-    )
+    # Full history, streamed without loading it into memory
+    if format == "ndjson":
+        return StreamingResponse(
+            _stream_bid_history(product_id, cursor),
+            media_type="application/x-ndjson"
+        )
     
-    # Add buyer name to each bid
-    for bid in bids:
-        buyer = db.query(User).filter(User.id == bid.buyer_id).first()
-        bid.buyer_name = buyer.name if buyer else "Unknown"
+    bids = _bid_history_page(db, product_id, cursor, limit)
+    if len(bids) == limit:
+        response.headers["X-Next-Cursor"] = str(bids[-1].id)
     
     return bids
 
@@ -150,44 +177,38 @@ async def get_my_active_bids(
     current_user: User = Depends(require_role([UserRole.BUYER, UserRole.ADMIN])),
     db: Session = Depends(get_db)
 ):
-    """Get all active bids by current user with product details"""
-    # Get all bids by user on active products
-    bids = (
-        db.query(Bid)
-        .join(Product)
+    """Get the current user's highest bid on each active product, with the leader flag"""
+    # One grouped query: my highest bid per product plus the denormalized leader.
+    # Bids on a product only go up, so my highest bid is also my latest one.
+    rows = (
+        db.query(
+            Product,
+            func.max(Bid.amount).label("my_bid"),
+            func.max(Bid.id).label("bid_id"),
+            func.max(Bid.timestamp).label("timestamp")
+        )
+        .join(Bid, Bid.product_id == Product.id)
         .filter(
             Bid.buyer_id == current_user.id,
             Product.status == AuctionStatus.ACTIVE,
             Product.end_time > datetime.utcnow()
         )
-        .order_by(Bid.timestamp.desc())
+        .group_by(Product.id)
+        .order_by(func.max(Bid.timestamp).desc())
         .all()
     )
     
-    result = []
-    for bid in bids:
-        product = bid.product
-        
-        # Check if user is leading
-        highest_bid = (
-            db.query(Bid)
-            .filter(Bid.product_id == product.id)
-            .order_by(Bid.amount.desc())
-            .first()
-        )
-        
-        is_leading = highest_bid and highest_bid.buyer_id == current_user.id
-        
-        result.append({
-            "bid_id": bid.id,
+    return [
+        {
+            "bid_id": bid_id,
             "product_id": product.id,
             "product_title": product.title,
             "product_image": product.images[0] if product.images else None,
-            "my_bid": bid.amount,
+            "my_bid": my_bid,
             "current_bid": product.current_bid,
-            "is_leading": is_leading,
+            "is_leading": product.leading_buyer_id == current_user.id,
             "end_time": product.end_time,
-            "timestamp": bid.timestamp
-        })
-    
-    return result
\ No newline at end of file
+            "timestamp": timestamp
+        }
+        for product, my_bid, bid_id, timestamp in rows
+    ]
@@ -84,18 +84,34 @@ async def create_payment_order(
             detail=f"Failed to create payment order: {str(e)}"
         )
     
-    # Create transaction record
-    transaction = Transaction(
-        product_id=product.id,
-        buyer_id=current_user.id,
-        seller_id=product.seller_id,
-        amount=amount,
-        platform_fee=platform_fee,
-        razorpay_order_id=razorpay_order["id"],
-        status=PaymentStatus.PENDING
+    # Reuse the pending transaction opened when the auction closed
+    transaction = (
+        db.query(Transaction)
+        .filter(
+            Transaction.product_id == product.id,
+            Transaction.buyer_id == current_user.id,
+            Transaction.status == PaymentStatus.PENDING
+        )
+        .first()
     )
     
-    db.add(transaction)
+    if transaction:
+        transaction.amount = amount
+        transaction.platform_fee = platform_fee
+        transaction.razorpay_order_id = razorpay_order["id"]
+    else:
+        # Create transaction record
+        transaction = Transaction(
+            product_id=product.id,
+            buyer_id=current_user.id,
+            seller_id=product.seller_id,
+            amount=amount,
+            platform_fee=platform_fee,
+            razorpay_order_id=razorpay_order["id"],
+            status=PaymentStatus.PENDING
+        )
+        db.add(transaction)
+    
     db.commit()
     db.refresh(transaction)
     
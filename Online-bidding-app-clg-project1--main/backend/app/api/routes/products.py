@@ -12,6 +12,8 @@ from app.models.bid import Bid
 from app.models.transaction import Transaction
 from app.schemas.product import ProductCreate, ProductUpdate, ProductResponse, ProductWithBids
 from app.services.websocket_manager import manager
+from app.services.auction_cache import auction_cache
+from app.services.auction_scheduler import auction_scheduler
 
 router = APIRouter()
 
@@ -54,17 +56,18 @@ async def get_products(
 
 
 @router.get("/{product_id}", response_model=ProductResponse)
-async def get_product(product_id: int, db: Session = Depends(get_db)):
+async def get_product(product_id: int):
     """Get a specific product by ID"""
-    product = db.query(Product).filter(Product.id == product_id).first()
+    # Served from the hot-state cache, so popular auction pages skip the database
+    auction = await auction_cache.load(product_id)
     
-    if not product:
+    if not auction:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Product not found"
         )
     
-    return product
+    return auction.to_response()
 
 
 @router.post("/", response_model=ProductResponse, status_code=status.HTTP_201_CREATED)
@@ -98,6 +101,7 @@ async def create_product(
     db.add(new_product)
     db.commit()
     db.refresh(new_product)
+    auction_scheduler.schedule(new_product.id, new_product.end_time)
     
     return new_product
 
@@ -132,6 +136,11 @@ async def update_product(
     
     db.commit()
     db.refresh(product)
+    auction_cache.invalidate(product.id)
+    if product.status == AuctionStatus.ACTIVE:
+        auction_scheduler.schedule(product.id, product.end_time)
+    else:
+        auction_scheduler.cancel(product.id)
     
     return product
 
@@ -168,6 +177,8 @@ async def delete_product(
     
     db.delete(product)
     db.commit()
+    auction_cache.invalidate(product_id)
+    auction_scheduler.cancel(product_id)
     
     return None
 
@@ -254,6 +265,8 @@ async def accept_bid_and_sell(
     db.add(transaction)
     db.commit()
     db.refresh(transaction)
+    auction_cache.invalidate(product.id)
+    auction_scheduler.cancel(product.id)
     
     # Send real-time notifications
     # Notify buyer
@@ -10,11 +10,31 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    PRINCIPAL_CACHE_SIZE: int = 10000  # Authenticated (user, token) pairs kept in memory
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 30  # Bounds staleness against admin changes made on other workers
+    AUTH_CLAIMS_ONLY: bool = True  # Authorize from verified token claims; the user row is read only when a route needs it
+    AUTH_REVOCATION_REFRESH_SECONDS: float = 5  # How soon other workers refuse tokens of a deactivated user
+    AUTH_RATE_LIMIT_BACKEND: str = "memory"  # "memory" (one worker) or "sqlite" (several workers on one host)
+    AUTH_RATE_LIMIT_SQLITE_PATH: str = "/tmp/bidding-auth-throttle.sqlite3"  # Shared buckets for the "sqlite" backend
+    AUTH_RATE_LIMIT_MAX_KEYS: int = 100000  # In-memory buckets kept before the least recently used are dropped
+    AUTH_RATE_LIMIT_IP_BURST: int = 20  # Login/register attempts one IP may make at once
+    AUTH_RATE_LIMIT_IP_PER_MINUTE: float = 20  # Sustained attempts per IP; 0 disables
+    AUTH_RATE_LIMIT_ACCOUNT_BURST: int = 5  # Attempts against one email at once
+    AUTH_RATE_LIMIT_ACCOUNT_PER_MINUTE: float = 5  # Sustained attempts per email; 0 disables
+    BCRYPT_ROUNDS: int = 12  # Password hash cost; stored hashes of another cost are redone at login
+    PASSWORD_HASH_WORKERS: int = 2  # Threads that run bcrypt, off the event loop
+    PASSWORD_HASH_MAX_PENDING: int = 64  # Hash/verify calls queued or running before logins get 503
     
     # Google OAuth
     GOOGLE_CLIENT_ID: str = ""
     GOOGLE_CLIENT_SECRET: str = ""
     GOOGLE_REDIRECT_URI: str = "http://localhost:8000/api/auth/google/callback"
+    GOOGLE_TOKEN_URL: str = "https://oauth2.googleapis.com/token"
+    GOOGLE_USERINFO_URL: str = "https://www.googleapis.com/oauth2/v2/userinfo"
+    GOOGLE_CERTS_URL: str = "https://www.googleapis.com/oauth2/v3/certs"  # JWKS used to verify ID tokens locally
+    GOOGLE_ISSUERS: str = "accounts.google.com,https://accounts.google.com"  # Accepted "iss" values, comma-separated
+    GOOGLE_HTTP_TIMEOUT_SECONDS: float = 10  # Per request to Google's endpoints
+    GOOGLE_HTTP_MAX_CONNECTIONS: int = 20  # Pooled keep-alive connections shared by all OAuth calls
     
     # Razorpay
     RAZORPAY_KEY_ID: str
@@ -38,6 +58,29 @@ class Settings(BaseSettings):
     UPLOAD_DIR: str = "uploads"
     MAX_FILE_SIZE: int = 5242880  # 5MB
     
+    # Bidding Engine
+    BID_COMMIT_WINDOW_MS: float = 3.0  # Group-commit wait before a batch is written
+    BID_COMMIT_MAX_BATCH: int = 200  # Bids per group-commit transaction
+    AUCTION_CACHE_SIZE: int = 5000  # Auctions whose hot state is kept in memory
+    AUCTION_CACHE_TTL_SECONDS: int = 30  # Bounds staleness against other workers' bids
+    IDEMPOTENCY_CACHE_SIZE: int = 10000  # Recent Idempotency-Key responses kept in memory
+    IDEMPOTENCY_TTL_SECONDS: int = 3600
+    
+    # WebSocket
+    WS_SEND_QUEUE_SIZE: int = 256  # Frames queued per socket before the slow-consumer policy applies
+    WS_SLOW_CONSUMER_POLICY: str = "conflate"  # "conflate" (drop superseded bids) or "evict"
+    WS_BACKPLANE: str = "memory"  # "memory" (one worker) or "unix" (several workers on one host)
+    WS_BACKPLANE_DIR: str = "/tmp/bidding-ws-backplane"  # Worker sockets for the "unix" backplane
+    WS_PER_MESSAGE_DEFLATE: bool = True  # Offer permessage-deflate; costs CPU per socket, saves bandwidth
+    WS_CONFLATION_HZ: float = 10.0  # auction_state flushes per second for ?mode=conflated clients (0 disables)
+    WS_HEARTBEAT_INTERVAL_SECONDS: float = 20.0  # Ping sockets quiet this long (0 disables heartbeats)
+    WS_IDLE_TIMEOUT_SECONDS: float = 60.0  # Close sockets that sent nothing for this long
+    WS_REPLAY_BUFFER_SIZE: int = 128  # Recent room messages kept for clients resuming with last_seq
+    WS_REPLAY_ROOMS: int = 1000  # Rooms whose recent messages are kept
+    WS_REPLAY_TTL_SECONDS: float = 600.0  # Keep a quiet room's messages this long
+    WS_MAX_SUBSCRIPTIONS: int = 100  # Product rooms one /ws socket may subscribe to
+    WS_MAX_BIDS_IN_FLIGHT: int = 8  # Socket bids awaiting their commit at once; more are refused with 429
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -45,6 +88,10 @@ class Settings(BaseSettings):
     @property
     def cors_origins(self) -> List[str]:
         return [origin.strip() for origin in self.ALLOWED_ORIGINS.split(",")]
+    
+    @property
+    def google_issuers(self) -> List[str]:
+        return [issuer.strip() for issuer in self.GOOGLE_ISSUERS.split(",")]
 
 
 settings = Settings()
\ No newline at end of file
@@ -1,17 +1,24 @@
+import time
 from datetime import datetime, timedelta
-from typing import Optional, Union
+from typing import Dict, Optional, Union
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from app.core.config import settings
-from app.models.user import User
-from app.core.database import get_db
-
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.models.user import User, UserRole
+from app.core.database import SessionLocal
+from app.services.token_revocations import token_revocations
+from app.utils.cache import TTLCache
+
+# Password hashing; async code should go through app.services.password_hasher
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS
+)
 
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
@@ -35,7 +42,9 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode.update({"exp": expire})
+    # iat lets the revocation set refuse tokens issued before a deactivation;
+    # to the millisecond, so a login just after a reactivation is told apart
+    to_encode.update({"exp": expire, "iat": round(time.time(), 3)})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
@@ -49,28 +58,146 @@ def decode_access_token(token: str) -> Optional[dict]:
         return None
 
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> User:
-    """Get the current authenticated user"""
-    credentials_exception = HTTPException(
+def _load_user(user_id: int) -> Optional[User]:
+    """Load a detached user with a short-lived session"""
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.id == user_id).first()
+        if user is not None:
+            db.expunge(user)
+        return user
+    finally:
+        db.close()
+
+
+class PrincipalCache:
+    """
+    Detached users by (user id, token): a bounded LRU with a short TTL, so
+    authenticated requests cost no query on a hit. Anything that changes a
+    user's is_active, role or existence must call invalidate(); the TTL
+    bounds staleness against changes made on other workers.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.users = TTLCache(maxsize, ttl)
+        # Bumped by invalidate(); entries from an older generation are ignored
+        self._generations: Dict[int, int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def load(self, user_id: int, token: str) -> Optional[User]:
+        """The user, read with a short-lived session on a miss"""
+        generation = self._generations.get(user_id, 0)
+        item = self.users.get((user_id, token))
+        if item is not None and item[0] == generation:
+            self.hits += 1
+            return item[1]
+
+        self.misses += 1
+        user = await run_in_threadpool(_load_user, user_id)
+        # Don't store a user read before a concurrent invalidate()
+        if user is not None and self._generations.get(user_id, 0) == generation:
+            self.users.set((user_id, token), (generation, user))
+        return user
+
+    def invalidate(self, user_id: int):
+        """Drop every cached token of a user after an admin change"""
+        self._generations[user_id] = self._generations.get(user_id, 0) + 1
+
+    def stats(self) -> dict:
+        return {
+            "cached_principals": len(self.users),
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+
+# Global instance
+principal_cache = PrincipalCache(
+    maxsize=settings.PRINCIPAL_CACHE_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS
+)
+
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    
+
+
+class Principal:
+    """
+    The caller as its token claims describe it: id, email, role and name
+    with no query. Routes that need any other User field depend on
+    get_current_user_record, which reads the row in the threadpool.
+    Only built for tokens that passed the revocation check, so it is active.
+    """
+    __slots__ = ("id", "email", "role", "name", "_user")
+    is_active = True
+
+    def __init__(self, user_id: int, email: str, role: UserRole, name: str):
+        self.id = user_id
+        self.email = email
+        self.role = role
+        self.name = name
+        self._user: Optional[User] = None
+
+    @classmethod
+    def from_claims(cls, user_id: int, payload: dict) -> Optional["Principal"]:
+        """None for tokens minted without the role, email and name claims"""
+        try:
+            return cls(user_id, payload["email"], UserRole(payload["role"]), payload["name"])
+        except (KeyError, ValueError):
+            return None
+
+    async def load(self) -> User:
+        """The full user row, read once in the threadpool"""
+        if self._user is None:
+            user = await run_in_threadpool(_load_user, self.id)
+            if user is None:
+                raise _credentials_exception()
+            self._user = user
+        return self._user
+
+
+async def _authenticate(token: str) -> Optional[Union[User, Principal]]:
+    """Principal from the claims, or the cached user; None when refused"""
     payload = decode_access_token(token)
-    if payload is None:
-        raise credentials_exception
+    if payload is None or payload.get("sub") is None:
+        return None
     
-    user_id: str = payload.get("sub")
-    if user_id is None:
-        raise credentials_exception
+    user_id = int(payload["sub"])
+    if token_revocations.is_revoked(user_id, payload.get("iat")):
+        return None
     
-    user = db.query(User).filter(User.id == int(user_id)).first()
+    if settings.AUTH_CLAIMS_ONLY:
+        principal = Principal.from_claims(user_id, payload)
+        if principal is not None:
+            return principal
+    
+    return await principal_cache.load(user_id, token)
+
+
+async def get_token_user(token: str) -> Optional[Union[User, Principal]]:
+    """The active user behind a token, or None; for websockets, which skip Depends"""
+    user = await _authenticate(token)
+    if user is None or not user.is_active:
+        return None
+    return user
+
+
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> Union[User, Principal]:
+    """
+    Get the current authenticated user.
+    With AUTH_CLAIMS_ONLY this is a Principal built from the verified token
+    and no query; otherwise it comes from the principal cache, a miss reading
+    the user in the threadpool with a short-lived session.
+    """
+    user = await _authenticate(token)
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
     
     return user
 
@@ -84,6 +211,15 @@ async def get_current_active_user(
     return current_user
 
 
+async def get_current_user_record(
+    current_user: Union[User, Principal] = Depends(get_current_active_user)
+) -> User:
+    """The current active user's full row, for routes that need more than the claims"""
+    if isinstance(current_user, Principal):
+        return await current_user.load()
+    return current_user
+
+
 def require_role(allowed_roles: list):
     """Dependency to check if user has required role"""
     async def role_checker(current_user: User = Depends(get_current_active_user)):
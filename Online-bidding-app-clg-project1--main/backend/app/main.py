@@ -1,12 +1,21 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Depends, Query
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Query
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
+from typing import Optional
 import uvicorn
 
 from app.core.config import settings
-from app.core.database import init_db, get_db
+from app.core.database import init_db
+from app.core.security import get_token_user
 from app.api import api_router
 from app.services.websocket_manager import manager
+from app.services.auction_cache import auction_cache
+from app.services.bid_placement import dispatch_socket_bid
+from app.services.password_hasher import password_hasher
+from app.services.token_revocations import token_revocations
+from app.services.auth_throttle import auth_throttle
+from app.services.google_oauth import google_oauth_service
+from app.services.auction_engine import auction_engine
+from app.services.auction_scheduler import auction_scheduler
 from app.models.product import Product
 from app.models.bid import Bid
 from app.models.user import User
@@ -27,6 +36,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Idempotent-Replayed"],
 )
 
 
@@ -37,6 +47,21 @@ async def startup_event():
     print("Initializing database...")
     init_db()
     print("Database initialized successfully!")
+    await token_revocations.start()
+    await manager.start()
+    await auction_scheduler.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background auction workers"""
+    await auction_scheduler.shutdown()
+    await auction_engine.shutdown()
+    await manager.shutdown()
+    await token_revocations.shutdown()
+    await auth_throttle.shutdown()
+    await google_oauth_service.shutdown()
+    password_hasher.shutdown()
 
 
 # Health check endpoint
@@ -58,73 +83,153 @@ async def health_check():
 app.include_router(api_router, prefix="/api")
 
 
+def _room_position(
+    connection,
+    product_id: int,
+    state,
+    stream: Optional[str],
+    last_seq: Optional[int]
+):
+    """
+    Where a socket joined a room's message stream, plus the messages it missed.
+    Call straight after joining: nothing may yield before they are queued, or
+    a live message could overtake them.
+    """
+    missed = manager.missed_messages(connection, product_id, stream, last_seq)
+    log = manager.room_log(product_id)
+    position = {
+        "product_id": product_id,
+        "active_viewers": manager.get_active_connections_count(product_id),
+        "stream": log.stream,
+        "seq": log.seq,
+        "resumed": missed is not None
+    }
+    if missed is None:
+        position["auction"] = state.to_response().model_dump(mode="json")
+    return position, missed
+
+
+def _product_id(data: dict) -> Optional[int]:
+    """A socket message's product_id, or None unless it is a JSON integer"""
+    product_id = data.get("product_id")
+    # Not isinstance: true/false would pass as 1/0
+    return product_id if type(product_id) is int else None
+
+
+async def _subscribe(connection, data: dict):
+    """Join the socket to a product room, resuming from last_seq when possible"""
+    product_id = _product_id(data)
+    if product_id is None:
+        await manager.send_personal_message({
+            "type": "error", "detail": "product_id is required"
+        }, connection)
+        return
+    if product_id not in connection.rooms and len(connection.rooms) >= settings.WS_MAX_SUBSCRIPTIONS:
+        await manager.send_personal_message({
+            "type": "error", "product_id": product_id, "detail": "Too many subscriptions"
+        }, connection)
+        return
+    
+    state = await auction_cache.load(product_id)
+    if state is None:
+        await manager.send_personal_message({
+            "type": "error", "product_id": product_id, "detail": "Product not found"
+        }, connection)
+        return
+    
+    manager.join(connection, product_id)
+    position, missed = _room_position(
+        connection, product_id, state, data.get("stream"), data.get("last_seq")
+    )
+    await manager.send_personal_message({"type": "subscribed", **position}, connection)
+    if missed:
+        manager.replay(connection, missed)
+
+
 # WebSocket endpoint for user notifications (dashboards)
 @app.websocket("/ws")
 async def websocket_user_endpoint(
     websocket: WebSocket,
-    token: str = Query(None)
+    token: str = Query(None),
+    mode: str = Query("full")
 ):
-    """WebSocket endpoint for user-specific notifications (buyer/seller dashboards)"""
-    from app.core.security import verify_token
-    
+    """
+    WebSocket endpoint for user-specific notifications (buyer/seller dashboards).
+    The same socket can subscribe to any number of product rooms and bid in them.
+    """
     # Verify token and get user
     if not token:
         await websocket.close(code=1008, reason="Token required")
         return
     
     try:
-        payload = verify_token(token)
-        user_id = payload.get("sub")
-        if not user_id:
-            await websocket.close(code=1008, reason="Invalid token")
-            return
-        
-        user_id = int(user_id)
+        user = await get_token_user(token)
     except Exception as e:
         print(f"Token verification failed: {e}")
+        user = None
+    if user is None:
         await websocket.close(code=1008, reason="Invalid token")
         return
+    user_id = user.id
     
-    # Accept connection
-    await websocket.accept()
-    
-    # Store user connection
-    manager.user_connections[user_id] = websocket
-    manager.websocket_to_user[websocket] = user_id
+    # Accept connection; a user may hold several sockets (tabs, devices)
+    connection = await manager.connect(websocket, user_id=user_id, mode=mode)
     
     print(f"✅ User {user_id} connected to WebSocket")
     
     try:
         # Send connection success message
-        await websocket.send_json({
+        await manager.send_personal_message({
             "type": "connected",
             "message": "Connected to real-time notifications",
             "user_id": user_id
-        })
+        }, connection)
         
         # Keep connection alive and listen for messages
         while True:
-            data = await websocket.receive_json()
+            data = await manager.receive(connection)
+            message_type = data.get("type")
             
             # Handle ping/pong for keep-alive
-            if data.get("type") == "ping":
-                await websocket.send_json({"type": "pong"})
+            if message_type == "ping":
+                await manager.send_personal_message({"type": "pong"}, connection)
+            
+            elif message_type == "subscribe":
+                await _subscribe(connection, data)
+            
+            elif message_type == "unsubscribe":
+                product_id = _product_id(data)
+                if product_id is None:
+                    await manager.send_personal_message({
+                        "type": "error", "detail": "product_id is required"
+                    }, connection)
+                    continue
+                manager.leave(connection, product_id)
+                await manager.send_personal_message({
+                    "type": "unsubscribed", "product_id": product_id
+                }, connection)
+            
+            elif message_type == "place_bid":
+                product_id = _product_id(data)
+                if product_id is None:
+                    await manager.send_personal_message({
+                        "type": "bid_rejected",
+                        "request_id": data.get("request_id"),
+                        "status": 422,
+                        "detail": "product_id is required"
+                    }, connection)
+                    continue
+                await dispatch_socket_bid(connection, token, product_id, data)
     
     except WebSocketDisconnect:
-        # Clean up user connection
-        if user_id in manager.user_connections:
-            del manager.user_connections[user_id]
-        if websocket in manager.websocket_to_user:
-            del manager.websocket_to_user[websocket]
+        # Clean up user connection and its send queue
+        manager.disconnect(connection)
         print(f"🔌 User {user_id} disconnected from WebSocket")
     
     except Exception as e:
         print(f"❌ WebSocket error for user {user_id}: {e}")
         # Clean up user connection
-        if user_id in manager.user_connections:
-            del manager.user_connections[user_id]
-        if websocket in manager.websocket_to_user:
-            del manager.websocket_to_user[websocket]
+        manager.disconnect(connection)
 
 
 # WebSocket endpoint for real-time bidding
@@ -133,45 +238,54 @@ async def websocket_auction_endpoint(
     websocket: WebSocket,
     product_id: int,
     token: str = Query(None),
-    db: Session = Depends(get_db)
+    mode: str = Query("full"),
+    stream: Optional[str] = Query(None),
+    last_seq: Optional[int] = Query(None)
 ):
-    """WebSocket endpoint for real-time auction updates"""
-    await manager.connect(websocket, product_id)
+    """WebSocket endpoint for real-time auction updates; bidders connect with ?token="""
+    # Viewers may be anonymous; a bidder's token is checked here and again per bid
+    if token and await get_token_user(token) is None:
+        await websocket.close(code=1008, reason="Invalid token")
+        return
+    
+    # Snapshot from the auction cache (one short query on a miss); the socket holds no DB session
+    state = await auction_cache.load(product_id)
+    if state is None:
+        await websocket.close(code=1008, reason="Product not found")
+        return
+    
+    connection = await manager.connect(websocket, product_id, mode=mode)
     
     try:
-        # Send initial connection success message
+        # A reconnecting client gets the room messages it missed, else a snapshot
+        position, missed = _room_position(connection, product_id, state, stream, last_seq)
         await manager.send_personal_message({
             "type": "connected",
             "message": f"Connected to auction {product_id}",
-            "active_viewers": manager.get_active_connections_count(product_id)
-        }, websocket)
+            **position
+        }, connection)
+        if missed:
+            manager.replay(connection, missed)
         
         # Listen for messages
         while True:
-            data = await websocket.receive_json()
+            data = await manager.receive(connection)
             
             # Handle different message types
             if data.get("type") == "ping":
-                await manager.send_personal_message({"type": "pong"}, websocket)
+                await manager.send_personal_message({"type": "pong"}, connection)
             
             elif data.get("type") == "place_bid":
-                # Broadcast new bid to all watchers
-                bid_amount = data.get("amount")
-                buyer_name = data.get("buyer_name", "Anonymous")
-                
-                await manager.broadcast_new_bid(product_id, {
-                    "amount": bid_amount,
-                    "buyer_name": buyer_name,
-                    "product_id": product_id
-                })
+                # Same validation and persistence as POST /api/bids/, acked on this socket
+                await dispatch_socket_bid(connection, token, product_id, data)
     
     except WebSocketDisconnect:
-        manager.disconnect(websocket, product_id)
+        manager.disconnect(connection)
         print(f"Client disconnected from auction {product_id}")
     
     except Exception as e:
         print(f"WebSocket error: {e}")
-        manager.disconnect(websocket, product_id)
+        manager.disconnect(connection)
 
 
 # Run the application
@@ -180,5 +294,6 @@ if __name__ == "__main__":
         "app.main:app",
         host=settings.HOST,
         port=settings.PORT,
-        reload=settings.DEBUG
+        reload=settings.DEBUG,
+        ws_per_message_deflate=settings.WS_PER_MESSAGE_DEFLATE
     )
\ No newline at end of file
@@ -2,5 +2,7 @@ from app.models.user import User
 from app.models.product import Product
 from app.models.bid import Bid
 from app.models.transaction import Transaction
+from app.models.proxy_bid import ProxyBid
+from app.models.token_revocation import TokenRevocation
 
-__all__ = ["User", "Product", "Bid", "Transaction"]
\ No newline at end of file
+__all__ = ["User", "Product", "Bid", "Transaction", "ProxyBid", "TokenRevocation"]
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, Float, String, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -13,7 +13,17 @@ class Bid(Base):
     buyer_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     amount = Column(Float, nullable=False)
     timestamp = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    idempotency_key = Column(String, nullable=True)  # Client's Idempotency-Key header
     
     # Relationships
     product = relationship("Product", back_populates="bids")
-    buyer = relationship("User", back_populates="bids")
\ No newline at end of file
+    buyer = relationship("User", back_populates="bids")
+    
+    __table_args__ = (
+        # Serves the per-product "my highest bid" aggregate for a buyer
+        Index("ix_bids_buyer_product_amount", "buyer_id", "product_id", "amount"),
+        # Keyset pagination of a product's history on (timestamp, id)
+        Index("ix_bids_product_timestamp_id", "product_id", "timestamp", "id"),
+        # A retried request can never store the same bid twice
+        Index("uq_bids_buyer_idempotency_key", "buyer_id", "idempotency_key", unique=True),
+    )
\ No newline at end of file
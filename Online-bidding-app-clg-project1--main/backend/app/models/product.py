@@ -29,6 +29,9 @@ class Product(Base):
     end_time = Column(DateTime(timezone=True), nullable=False)
     status = Column(Enum(AuctionStatus), default=AuctionStatus.DRAFT, index=True)
     winner_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    # Denormalized leader, maintained by the bid path
+    leading_buyer_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    leading_bid_id = Column(Integer, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
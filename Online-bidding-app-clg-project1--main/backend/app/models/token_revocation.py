@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+
+class TokenRevocation(Base):
+    __tablename__ = "token_revocations"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, nullable=False, index=True)  # No foreign key: outlives deleted users
+    not_before = Column(DateTime, nullable=False)  # Tokens issued before this (UTC) are refused
+    reason = Column(String, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -1,13 +1,13 @@
 from app.schemas.user import UserCreate, UserLogin, UserResponse, UserUpdate
 from app.schemas.product import ProductCreate, ProductUpdate, ProductResponse
-from app.schemas.bid import BidCreate, BidResponse
+from app.schemas.bid import BidCreate, BidResponse, ProxyBidCreate, ProxyBidResponse
 from app.schemas.transaction import TransactionCreate, TransactionResponse
 from app.schemas.token import Token, TokenData
 
 __all__ = [
     "UserCreate", "UserLogin", "UserResponse", "UserUpdate",
     "ProductCreate", "ProductUpdate", "ProductResponse",
-    "BidCreate", "BidResponse",
+    "BidCreate", "BidResponse", "ProxyBidCreate", "ProxyBidResponse",
     "TransactionCreate", "TransactionResponse",
     "Token", "TokenData"
 ]
\ No newline at end of file
@@ -19,4 +19,16 @@ class BidResponse(BidBase):
     buyer_name: Optional[str] = None
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class ProxyBidCreate(BaseModel):
+    product_id: int
+    max_amount: float = Field(..., gt=0)
+
+
+class ProxyBidResponse(BaseModel):
+    product_id: int
+    max_amount: float
+    current_bid: float
+    is_leading: bool
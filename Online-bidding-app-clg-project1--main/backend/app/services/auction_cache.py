@@ -0,0 +1,180 @@
+"""
+Auction Hot-State Cache
+Keeps the hot columns of recently used auctions in process memory
+"""
+import asyncio
+from datetime import datetime, timezone
+from functools import partial
+from typing import Dict, Optional, Set
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.product import Product
+from app.models.proxy_bid import ProxyBid
+from app.models.user import User
+from app.schemas.product import ProductResponse
+from app.services.proxy_bidding import ProxyBook, ProxyEntry
+from app.utils.cache import TTLCache
+
+
+def to_naive_utc(value: datetime) -> datetime:
+    """Normalize a datetime to naive UTC so it compares with datetime.utcnow()"""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class AuctionState:
+    """Hot columns of an auction, updated in place by its sequencer"""
+
+    __slots__ = (
+        "product_id", "seller_id", "title", "current_bid", "bid_increment",
+        "end_time", "status", "leader_id", "proxies", "detail"
+    )
+
+    def __init__(self, product: Product):
+        self.product_id = product.id
+        self.seller_id = product.seller_id
+        self.title = product.title
+        self.current_bid = product.current_bid
+        self.bid_increment = product.bid_increment
+        self.end_time = to_naive_utc(product.end_time)
+        self.status = product.status
+        self.leader_id = product.leading_buyer_id
+        self.proxies = ProxyBook()
+        # The rest of the product page; only the hot columns above change while cached
+        self.detail = ProductResponse.model_validate(product)
+
+    @property
+    def minimum_bid(self) -> float:
+        return self.current_bid + self.bid_increment
+
+    def to_response(self) -> ProductResponse:
+        """The product detail with the live hot columns"""
+        return self.detail.model_copy(update={
+            "current_bid": self.current_bid,
+            "status": self.status
+        })
+
+
+def _load_state(product_id: int) -> Optional[AuctionState]:
+    """Read the product and its live proxies with a short-lived session"""
+    db = SessionLocal()
+    try:
+        product = db.query(Product).filter(Product.id == product_id).first()
+        if not product:
+            return None
+
+        state = AuctionState(product)
+
+        proxies = (
+            db.query(ProxyBid, User.name)
+            .join(User, User.id == ProxyBid.buyer_id)
+            .filter(
+                ProxyBid.product_id == product_id,
+                ProxyBid.is_active == True,
+                ProxyBid.max_amount > product.current_bid
+            )
+            .all()
+        )
+        for proxy, buyer_name in proxies:
+            state.proxies.register(
+                ProxyEntry(proxy.buyer_id, buyer_name, proxy.max_amount, proxy.id)
+            )
+        return state
+    finally:
+        db.close()
+
+
+class AuctionCache:
+    """
+    Bounded LRU of AuctionState, one object per product. The bid path mutates
+    the cached object in place and product reads are served from it. The TTL
+    bounds staleness against bids taken by other workers; anything that edits
+    a product outside the bid path must call invalidate().
+    A state with bid writes still pending is pinned: it is ahead of the
+    database, so it outlives its TTL, and a reload asked for by invalidate()
+    waits until those writes have settled.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.states = TTLCache(maxsize, ttl)
+        # Bumped by invalidate() so a load that raced it is not stored
+        self._generations: Dict[int, int] = {}
+        self._pinned: Dict[int, AuctionState] = {}
+        self._pending: Dict[int, Set[asyncio.Future]] = {}
+        # Pinned products invalidated since; reloaded once their writes settle
+        self._stale: Set[int] = set()
+        self.hits = 0
+        self.misses = 0
+
+    def track(self, product_id: int, state: AuctionState, write: asyncio.Future):
+        """Pin a product's state until a write it accepted has settled"""
+        self._pinned[product_id] = state
+        self._pending.setdefault(product_id, set()).add(write)
+        write.add_done_callback(partial(self._settled, product_id))
+
+    def _settled(self, product_id: int, write: asyncio.Future):
+        pending = self._pending.get(product_id)
+        if pending is None:
+            return
+        pending.discard(write)
+        if not pending:
+            del self._pending[product_id]
+            del self._pinned[product_id]
+            self._stale.discard(product_id)
+
+    async def load(self, product_id: int) -> Optional[AuctionState]:
+        """The cached state, read from the database on a miss"""
+        if product_id in self._pending:
+            if product_id not in self._stale:
+                self.hits += 1
+                return self._pinned[product_id]
+            # A reload now would read behind our own uncommitted bids
+            await asyncio.wait(list(self._pending[product_id]))
+
+        state = self.states.get(product_id)
+        if state is not None:
+            self.hits += 1
+            return state
+
+        self.misses += 1
+        generation = self._generations.get(product_id, 0)
+        state = await run_in_threadpool(_load_state, product_id)
+        if state is None:
+            return None
+
+        # Bids accepted while we were reading are not in our copy
+        if product_id in self._pending:
+            return self._pinned[product_id]
+        # Keep the first object stored so every caller mutates the same state
+        existing = self.states.get(product_id)
+        if existing is not None:
+            return existing
+        if self._generations.get(product_id, 0) == generation:
+            self.states.set(product_id, state)
+        return state
+
+    def invalidate(self, product_id: int):
+        """Drop a product after it was changed outside the bid path"""
+        self.states.pop(product_id)
+        self._generations[product_id] = self._generations.get(product_id, 0) + 1
+        if product_id in self._pending:
+            self._stale.add(product_id)
+
+    def stats(self) -> dict:
+        return {
+            "cached_auctions": len(self.states),
+            "pinned_auctions": len(self._pinned),
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+
+# Global instance
+auction_cache = AuctionCache(
+    maxsize=settings.AUCTION_CACHE_SIZE,
+    ttl=settings.AUCTION_CACHE_TTL_SECONDS
+)
@@ -0,0 +1,360 @@
+"""
+Auction Engine
+Orders and validates bids for each active product in memory
+"""
+import asyncio
+from functools import partial
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.database import SessionLocal
+from app.models.product import AuctionStatus
+from app.models.bid import Bid
+from app.models.proxy_bid import ProxyBid
+from app.services.auction_cache import AuctionState, auction_cache
+from app.services.bid_writer import bid_writer
+from app.services.proxy_bidding import ProxyEntry
+
+# Seconds a sequencer may sit idle before it is retired
+SEQUENCER_IDLE_TIMEOUT = 60.0
+
+# Sequencer command kinds
+PLACE_BID = "bid"
+REGISTER_PROXY = "proxy"
+
+
+class BidRejected(Exception):
+    """Raised when a bid fails validation against the auction state"""
+
+    def __init__(self, detail: str, status_code: int = 400):
+        super().__init__(detail)
+        self.detail = detail
+        self.status_code = status_code
+
+
+class BidOutcome:
+    """What one sequencer command wrote: the caller's bid and any proxy bids it triggered"""
+
+    __slots__ = ("bid", "auto_bids", "state")
+
+    def __init__(self, bid: Optional[Bid], auto_bids: List[Bid], state: AuctionState):
+        self.bid = bid
+        self.auto_bids = auto_bids
+        self.state = state
+
+    @property
+    def final_bid(self) -> Optional[Bid]:
+        """The bid now standing on the product after this command"""
+        return self.auto_bids[-1] if self.auto_bids else self.bid
+
+
+def _store_proxy(product_id: int, buyer_id: int, max_amount: float) -> int:
+    """Replace a buyer's proxy row and return the new row id"""
+    db = SessionLocal()
+    try:
+        db.query(ProxyBid).filter(
+            ProxyBid.product_id == product_id,
+            ProxyBid.buyer_id == buyer_id,
+            ProxyBid.is_active == True
+        ).update({ProxyBid.is_active: False}, synchronize_session=False)
+        proxy = ProxyBid(product_id=product_id, buyer_id=buyer_id, max_amount=max_amount)
+        db.add(proxy)
+        db.flush()
+        proxy_id = proxy.id
+        db.commit()
+        return proxy_id
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def _validate_open(state: Optional[AuctionState], buyer_id: int):
+    if state is None:
+        raise BidRejected("Product not found", status_code=404)
+
+    if state.status != AuctionStatus.ACTIVE:
+        raise BidRejected("Auction is not active")
+
+    if state.end_time <= datetime.utcnow():
+        raise BidRejected("Auction has ended")
+
+    if state.seller_id == buyer_id:
+        raise BidRejected("Sellers cannot bid on their own products")
+
+
+def validate_bid(state: Optional[AuctionState], buyer_id: int, amount: float):
+    """Raise BidRejected if the bid is not acceptable against `state`"""
+    _validate_open(state, buyer_id)
+
+    if amount < state.minimum_bid:
+        raise BidRejected(f"Bid must be at least ₹{state.minimum_bid}")
+
+
+def validate_proxy(state: Optional[AuctionState], buyer_id: int, max_amount: float):
+    """Raise BidRejected if the hidden maximum could never bid"""
+    _validate_open(state, buyer_id)
+
+    if state.leader_id == buyer_id:
+        if max_amount <= state.current_bid:
+            raise BidRejected(f"Maximum bid must be above ₹{state.current_bid}")
+    elif max_amount < state.minimum_bid:
+        raise BidRejected(f"Maximum bid must be at least ₹{state.minimum_bid}")
+
+
+class AuctionSequencer:
+    """Single writer for one product: bids are validated and persisted in arrival order"""
+
+    def __init__(
+        self,
+        engine: "AuctionEngine",
+        product_id: int,
+        queue: Optional[asyncio.Queue] = None
+    ):
+        self.engine = engine
+        self.product_id = product_id
+        # A replacement for a crashed sequencer takes over its queue
+        self.queue: asyncio.Queue = queue or asyncio.Queue()
+        self.task = asyncio.create_task(self._run())
+
+    def submit(
+        self,
+        kind: str,
+        buyer_id: int,
+        buyer_name: str,
+        amount: float,
+        idempotency_key: Optional[str] = None
+    ) -> asyncio.Future:
+        """Enqueue a command; the returned future resolves to a BidOutcome"""
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((kind, buyer_id, buyer_name, amount, idempotency_key, future))
+        return future
+
+    def mark_stale(self):
+        """Force a reload from the database before the next bid is ordered"""
+        auction_cache.invalidate(self.product_id)
+
+    async def _run(self):
+        while True:
+            try:
+                kind, buyer_id, buyer_name, amount, idempotency_key, future = await asyncio.wait_for(
+                    self.queue.get(), timeout=SEQUENCER_IDLE_TIMEOUT
+                )
+            except asyncio.TimeoutError:
+                if self.queue.empty():
+                    self.engine._retire(self)
+                    return
+                continue
+
+            if future.done():
+                continue
+
+            try:
+                await self._process(kind, buyer_id, buyer_name, amount, idempotency_key, future)
+            except Exception as e:
+                self._crash(future, e)
+                return
+
+    async def _process(
+        self,
+        kind: str,
+        buyer_id: int,
+        buyer_name: str,
+        amount: float,
+        idempotency_key: Optional[str],
+        future: asyncio.Future
+    ):
+        """Validate one command against the cached state and hand its bids to the writer"""
+        try:
+            state = await auction_cache.load(self.product_id)
+            if kind == PLACE_BID:
+                validate_bid(state, buyer_id, amount)
+            else:
+                validate_proxy(state, buyer_id, amount)
+                proxy_id = await run_in_threadpool(
+                    _store_proxy, self.product_id, buyer_id, amount
+                )
+                state.proxies.register(
+                    ProxyEntry(buyer_id, buyer_name, amount, proxy_id)
+                )
+        except BidRejected as e:
+            future.set_exception(e)
+            return
+        except Exception as e:
+            self.mark_stale()
+            future.set_exception(e)
+            return
+
+        # Accept optimistically and move on; the group-commit writer keeps
+        # our order and its guarded update is the final word
+        writes = []
+        if kind == PLACE_BID:
+            writes.append(self._write(state, buyer_id, buyer_name, amount, idempotency_key))
+        for entry, price in state.proxies.resolve(
+            state.current_bid, state.bid_increment, state.leader_id
+        ):
+            writes.append(self._write(state, entry.buyer_id, entry.buyer_name, price))
+
+        if not writes:
+            future.set_result(BidOutcome(None, [], state))
+            return
+
+        asyncio.gather(*writes, return_exceptions=True).add_done_callback(
+            partial(self._settle, future=future, kind=kind, state=state, buyer_id=buyer_id, amount=amount)
+        )
+
+    def _crash(self, future: asyncio.Future, error: Exception):
+        """Fail the command that broke the loop and hand the queue to a fresh sequencer"""
+        print(f"Sequencer for product {self.product_id} failed: {error}")
+        self.mark_stale()
+        if not future.done():
+            future.set_exception(error)
+        self.engine._retire(self)
+        if not self.queue.empty():
+            self.engine._replace(self)
+
+    def _write(
+        self,
+        state: AuctionState,
+        buyer_id: int,
+        buyer_name: str,
+        amount: float,
+        idempotency_key: Optional[str] = None
+    ) -> asyncio.Future:
+        """Apply a bid to the cached state and hand it to the writer"""
+        state.current_bid = amount
+        state.leader_id = buyer_id
+        write = bid_writer.submit(self.product_id, buyer_id, amount, idempotency_key)
+        # Until it commits, the database is behind this state: keep it from being reloaded
+        auction_cache.track(self.product_id, state, write)
+        write.add_done_callback(partial(_name_bid, buyer_name=buyer_name))
+        return write
+
+    def _settle(
+        self,
+        writes: asyncio.Future,
+        future: asyncio.Future,
+        kind: str,
+        state: AuctionState,
+        buyer_id: int,
+        amount: float
+    ):
+        """Resolve the caller's request once its bids have been committed"""
+        if writes.cancelled():
+            future.cancel()
+            return
+
+        results = writes.result()
+        if any(not isinstance(result, Bid) for result in results):
+            # The database disagreed with memory (another worker, an edit or a close)
+            self.mark_stale()
+
+        own_bid = None
+        if kind == PLACE_BID:
+            own_bid, results = results[0], results[1:]
+            if isinstance(own_bid, BaseException):
+                if not future.done():
+                    future.set_exception(own_bid)
+                return
+            if own_bid is None:
+                asyncio.create_task(self._reject_with_reason(future, buyer_id, amount))
+                return
+
+        auto_bids = [result for result in results if isinstance(result, Bid)]
+        if not future.done():
+            future.set_result(BidOutcome(own_bid, auto_bids, state))
+
+    async def _reject_with_reason(self, future: asyncio.Future, buyer_id: int, amount: float):
+        """Reload the product so the rejection carries the real reason"""
+        try:
+            validate_bid(await auction_cache.load(self.product_id), buyer_id, amount)
+            error = BidRejected("Auction state changed, please retry", status_code=409)
+        except Exception as e:
+            error = e
+        if not future.done():
+            future.set_exception(error)
+
+
+def _name_bid(write: asyncio.Future, buyer_name: str):
+    """Attach the bidder's display name to a committed bid"""
+    if not write.cancelled() and write.exception() is None and write.result() is not None:
+        write.result().buyer_name = buyer_name
+
+
+class AuctionEngine:
+    """Keeps one sequencer per product that is currently receiving bids"""
+
+    def __init__(self):
+        self.sequencers: Dict[int, AuctionSequencer] = {}
+
+    async def _submit(
+        self,
+        kind: str,
+        product_id: int,
+        buyer_id: int,
+        buyer_name: str,
+        amount: float,
+        idempotency_key: Optional[str] = None
+    ) -> BidOutcome:
+        sequencer = self.sequencers.get(product_id)
+        if sequencer is None or sequencer.task.done():
+            if await auction_cache.load(product_id) is None:
+                raise BidRejected("Product not found", status_code=404)
+            # Another request may have created the sequencer while we were loading
+            sequencer = self.sequencers.get(product_id)
+            if sequencer is None:
+                sequencer = AuctionSequencer(self, product_id)
+                self.sequencers[product_id] = sequencer
+            elif sequencer.task.done():
+                sequencer = self._replace(sequencer)
+
+        return await sequencer.submit(kind, buyer_id, buyer_name, amount, idempotency_key)
+
+    async def place_bid(
+        self,
+        product_id: int,
+        buyer_id: int,
+        buyer_name: str,
+        amount: float,
+        idempotency_key: Optional[str] = None
+    ) -> BidOutcome:
+        """Order a bid behind every earlier command on the same product"""
+        return await self._submit(
+            PLACE_BID, product_id, buyer_id, buyer_name, amount, idempotency_key
+        )
+
+    async def register_proxy(
+        self,
+        product_id: int,
+        buyer_id: int,
+        buyer_name: str,
+        max_amount: float
+    ) -> BidOutcome:
+        """Register a hidden maximum and let competing proxies fight it out"""
+        return await self._submit(REGISTER_PROXY, product_id, buyer_id, buyer_name, max_amount)
+
+    def _retire(self, sequencer: AuctionSequencer):
+        if self.sequencers.get(sequencer.product_id) is sequencer:
+            del self.sequencers[sequencer.product_id]
+
+    def _replace(self, sequencer: AuctionSequencer) -> AuctionSequencer:
+        """Start a sequencer that takes over the commands queued on a dead one"""
+        replacement = AuctionSequencer(self, sequencer.product_id, sequencer.queue)
+        self.sequencers[sequencer.product_id] = replacement
+        return replacement
+
+    async def shutdown(self):
+        """Cancel every sequencer task and flush the bid writer"""
+        sequencers = list(self.sequencers.values())
+        self.sequencers.clear()
+        for sequencer in sequencers:
+            sequencer.task.cancel()
+        await asyncio.gather(*(s.task for s in sequencers), return_exceptions=True)
+        await bid_writer.shutdown()
+
+
+# Global instance
+auction_engine = AuctionEngine()
@@ -0,0 +1,236 @@
+"""
+Auction Close Scheduler
+Closes each active auction at its end_time
+"""
+import asyncio
+import heapq
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import update
+from starlette.concurrency import run_in_threadpool
+
+from app.core.database import SessionLocal
+from app.models.product import Product, AuctionStatus
+from app.models.bid import Bid
+from app.models.user import User
+from app.models.transaction import Transaction, PaymentStatus
+from app.services.auction_cache import auction_cache, to_naive_utc
+from app.services.websocket_manager import manager
+
+# Backoff between attempts to close a lot whose close failed (doubles per failure)
+CLOSE_RETRY_BASE_SECONDS = 1.0
+CLOSE_RETRY_MAX_SECONDS = 60.0
+
+
+def _load_deadlines() -> List[Tuple[int, datetime]]:
+    """Read (id, end_time) of every active auction once, at startup"""
+    db = SessionLocal()
+    try:
+        return db.query(Product.id, Product.end_time).filter(
+            Product.status == AuctionStatus.ACTIVE
+        ).all()
+    finally:
+        db.close()
+
+
+def _close_auction(product_id: int) -> Optional[dict]:
+    """
+    Mark an ended auction completed, pick the top bid as winner and open a
+    pending transaction. Returns None if the auction was not ours to close
+    (already closed by another worker, sold, or its end_time moved).
+    """
+    db = SessionLocal()
+    try:
+        result = db.execute(
+            update(Product)
+            .where(
+                Product.id == product_id,
+                Product.status == AuctionStatus.ACTIVE,
+                Product.end_time <= datetime.now(timezone.utc)
+            )
+            .values(status=AuctionStatus.COMPLETED)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != 1:
+            db.rollback()
+            return None
+
+        product = db.query(Product).filter(Product.id == product_id).first()
+        top_bids = db.query(Bid, User.name).join(User, User.id == Bid.buyer_id)
+        if product.leading_bid_id is not None:
+            top = top_bids.filter(Bid.id == product.leading_bid_id).first()
+        else:
+            top = (
+                top_bids
+                .filter(Bid.product_id == product_id)
+                .order_by(Bid.amount.desc())
+                .first()
+            )
+
+        summary = {
+            "product_id": product.id,
+            "product_title": product.title,
+            "seller_id": product.seller_id,
+            "winner_id": None,
+            "winner_name": None,
+            "final_amount": None,
+            "transaction_id": None
+        }
+
+        if top:
+            bid, winner_name = top
+            product.winner_id = bid.buyer_id
+            transaction = Transaction(
+                product_id=product.id,
+                buyer_id=bid.buyer_id,
+                seller_id=product.seller_id,
+                amount=bid.amount,
+                platform_fee=bid.amount * 0.05,  # 5% platform fee
+                status=PaymentStatus.PENDING
+            )
+            db.add(transaction)
+            db.flush()
+            summary.update({
+                "winner_id": bid.buyer_id,
+                "winner_name": winner_name,
+                "final_amount": bid.amount,
+                "transaction_id": transaction.id
+            })
+
+        db.commit()
+        return summary
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+class AuctionCloseScheduler:
+    """
+    Min-heap of (end_time, product_id) drained by one task that sleeps until
+    the earliest deadline. Rescheduled or cancelled entries are skipped lazily,
+    so scheduling stays O(log n) per lot.
+    """
+
+    def __init__(self):
+        self.deadlines: Dict[int, datetime] = {}
+        self._heap: List[Tuple[datetime, int]] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self.task: Optional[asyncio.Task] = None
+        # Consecutive failed closes per lot, for the retry backoff
+        self._failures: Dict[int, int] = {}
+
+    async def start(self):
+        """Load active auctions once and start the timer task"""
+        self._wakeup = asyncio.Event()
+        for product_id, end_time in await run_in_threadpool(_load_deadlines):
+            self.schedule(product_id, end_time)
+        self.task = asyncio.create_task(self._run())
+        print(f"Auction scheduler started with {len(self.deadlines)} active auctions")
+
+    def schedule(self, product_id: int, end_time: datetime):
+        """Close `product_id` at `end_time` (replaces any earlier deadline)"""
+        deadline = to_naive_utc(end_time)
+        self.deadlines[product_id] = deadline
+        heapq.heappush(self._heap, (deadline, product_id))
+        if self._wakeup is not None and self._heap[0] == (deadline, product_id):
+            self._wakeup.set()
+
+    def cancel(self, product_id: int):
+        """Forget a product's deadline (sold early, cancelled or deleted)"""
+        self.deadlines.pop(product_id, None)
+        self._failures.pop(product_id, None)
+
+    def _peek(self) -> Optional[Tuple[datetime, int]]:
+        while self._heap:
+            deadline, product_id = self._heap[0]
+            if self.deadlines.get(product_id) == deadline:
+                return self._heap[0]
+            heapq.heappop(self._heap)
+        return None
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            head = self._peek()
+            if head is None:
+                await self._wakeup.wait()
+                continue
+
+            delay = (head[0] - datetime.utcnow()).total_seconds()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            heapq.heappop(self._heap)
+            deadline, product_id = head
+            try:
+                summary = await run_in_threadpool(_close_auction, product_id)
+            except Exception as e:
+                self._retry(product_id, e)
+                continue
+
+            self._failures.pop(product_id, None)
+            # Unless the lot was rescheduled while we were closing it
+            if self.deadlines.get(product_id) == deadline:
+                del self.deadlines[product_id]
+            auction_cache.invalidate(product_id)
+            if summary is None:
+                continue
+            try:
+                await self._announce(product_id, summary)
+            except Exception as e:
+                print(f"Error announcing the close of auction {product_id}: {e}")
+
+    def _retry(self, product_id: int, error: Exception):
+        """Keep a lot whose close failed scheduled, retrying with backoff"""
+        failures = self._failures.get(product_id, 0) + 1
+        self._failures[product_id] = failures
+        delay = min(CLOSE_RETRY_BASE_SECONDS * 2 ** (failures - 1), CLOSE_RETRY_MAX_SECONDS)
+        print(f"Error closing auction {product_id} (attempt {failures}), retrying in {delay:.0f}s: {error}")
+        self.schedule(product_id, datetime.utcnow() + timedelta(seconds=delay))
+
+    async def _announce(self, product_id: int, summary: dict):
+        """Tell the winner, the seller and the room that the auction closed"""
+
+        print(f"Auction {product_id} closed. Winner: {summary['winner_id']}")
+
+        if summary["winner_id"] is not None:
+            await manager.notify_buyer(summary["winner_id"], {
+                "message": f"You won {summary['product_title']} for ₹{summary['final_amount']}! Complete your payment to claim it.",
+                "product_id": product_id,
+                "product_title": summary["product_title"],
+                "amount": summary["final_amount"],
+                "transaction_id": summary["transaction_id"]
+            })
+            await manager.notify_seller(summary["seller_id"], {
+                "message": f"Your auction for {summary['product_title']} ended at ₹{summary['final_amount']}",
+                "product_id": product_id,
+                "product_title": summary["product_title"],
+                "bid_amount": summary["final_amount"],
+                "buyer_name": summary["winner_name"],
+                "buyer_id": summary["winner_id"]
+            })
+
+        await manager.broadcast_auction_ended(product_id, {
+            "product_id": product_id,
+            "product_title": summary["product_title"],
+            "final_amount": summary["final_amount"],
+            "winner_name": summary["winner_name"]
+        })
+
+    async def shutdown(self):
+        """Stop the timer task"""
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+
+# Global instance
+auction_scheduler = AuctionCloseScheduler()
@@ -0,0 +1,220 @@
+"""
+Auth Throttle
+Per-IP and per-account rate limits on login and register, checked before any password hashing
+"""
+import asyncio
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
+from app.core.config import settings
+
+# Seconds between sweeps of buckets that have refilled completely
+SWEEP_INTERVAL = 60.0
+
+
+class RateLimited(Exception):
+    """Raised when a caller is over a limit; retry_after is in seconds"""
+
+    def __init__(self, retry_after: float, detail: str = "Too many attempts, try again later"):
+        super().__init__(detail)
+        self.retry_after = retry_after
+        self.detail = detail
+
+
+class MemoryBucketStore:
+    """
+    One worker: token buckets kept GCRA-style as a single float per key, the
+    time the bucket will be full again. Full buckets are equivalent to no
+    entry, so sweeps simply drop every timestamp in the past. Past max_keys
+    the least recently limited keys are dropped first.
+    """
+
+    name = "memory"
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self.full_at: Dict[str, float] = {}
+        self._swept = time.monotonic()
+        self.evicted = 0
+
+    async def acquire(self, key: str, interval: float, burst: int) -> float:
+        """Take one token; 0 when allowed, else seconds until one is available"""
+        now = time.monotonic()
+        if now - self._swept >= SWEEP_INTERVAL:
+            self._sweep(now)
+
+        # Re-inserted on every use, so the dict stays in least recently used order
+        previous = self.full_at.pop(key, None)
+        if previous is None and len(self.full_at) >= self.max_keys:
+            del self.full_at[next(iter(self.full_at))]
+            self.evicted += 1
+        full_at = now if previous is None else max(previous, now)
+        wait = full_at + interval - now - burst * interval
+        if wait > 0:
+            self.full_at[key] = full_at
+            return wait
+        self.full_at[key] = full_at + interval
+        return 0.0
+
+    def _sweep(self, now: float):
+        self._swept = now
+        for key in [k for k, full_at in self.full_at.items() if full_at <= now]:
+            del self.full_at[key]
+
+    async def shutdown(self):
+        pass
+
+    def stats(self) -> dict:
+        return {"backend": self.name, "keys": len(self.full_at), "evicted": self.evicted}
+
+
+class SqliteBucketStore:
+    """
+    Several workers on one host: the same buckets in a shared SQLite file,
+    updated under BEGIN IMMEDIATE from one dedicated thread per worker. If
+    the file is unavailable the check fails open; the password hasher's
+    queue bound still caps the CPU spent.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str):
+        self.path = path
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._conn: Optional[sqlite3.Connection] = None
+        self._swept = 0.0
+        self.errors = 0
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="auth-throttle")
+        return self._executor
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=1.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, full_at REAL NOT NULL) WITHOUT ROWID"
+            )
+            self._conn = conn
+        return self._conn
+
+    def _acquire(self, key: str, interval: float, burst: int) -> float:
+        # Wall clock: the file is shared between processes
+        now = time.time()
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if now - self._swept >= SWEEP_INTERVAL:
+                self._swept = now
+                conn.execute("DELETE FROM buckets WHERE full_at <= ?", (now,))
+            row = conn.execute("SELECT full_at FROM buckets WHERE key = ?", (key,)).fetchone()
+            full_at = max(row[0], now) if row else now
+            wait = full_at + interval - now - burst * interval
+            if wait <= 0:
+                conn.execute(
+                    "INSERT INTO buckets (key, full_at) VALUES (?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET full_at = excluded.full_at",
+                    (key, full_at + interval)
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return max(wait, 0.0)
+
+    async def acquire(self, key: str, interval: float, burst: int) -> float:
+        """Take one token; 0 when allowed, else seconds until one is available"""
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self.executor, self._acquire, key, interval, burst
+            )
+        except sqlite3.Error as e:
+            self.errors += 1
+            print(f"Auth throttle store unavailable, allowing request: {e}")
+            return 0.0
+
+    async def shutdown(self):
+        if self._executor is not None:
+            await asyncio.get_running_loop().run_in_executor(self._executor, self._close)
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def _close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def stats(self) -> dict:
+        return {"backend": self.name, "errors": self.errors}
+
+
+def create_bucket_store(backend: str, path: str, max_keys: int):
+    """Build the store named by settings.AUTH_RATE_LIMIT_BACKEND"""
+    if backend == SqliteBucketStore.name:
+        return SqliteBucketStore(path)
+    if backend == MemoryBucketStore.name:
+        return MemoryBucketStore(max_keys)
+    raise ValueError(f"Unknown AUTH_RATE_LIMIT_BACKEND: {backend}")
+
+
+class AuthThrottle:
+    """
+    Two token buckets per action: one per client IP (bursts from one host)
+    and one per account email (stuffing spread across hosts). A limit of 0
+    per minute disables that bucket.
+    """
+
+    def __init__(
+        self,
+        store,
+        ip_burst: int,
+        ip_per_minute: float,
+        account_burst: int,
+        account_per_minute: float
+    ):
+        self.store = store
+        self.limits = (
+            ("ip", ip_burst, ip_per_minute),
+            ("account", account_burst, account_per_minute)
+        )
+        self.allowed = 0
+        self.rejected = 0
+
+    async def check(self, action: str, client_ip: Optional[str], account: str):
+        """Raise RateLimited if this attempt is over either limit"""
+        subjects = {"ip": client_ip or "unknown", "account": account.strip().lower()}
+        for kind, burst, per_minute in self.limits:
+            if per_minute <= 0:
+                continue
+            wait = await self.store.acquire(
+                f"{action}:{kind}:{subjects[kind]}", 60.0 / per_minute, max(burst, 1)
+            )
+            if wait > 0:
+                self.rejected += 1
+                raise RateLimited(wait)
+        self.allowed += 1
+
+    async def shutdown(self):
+        await self.store.shutdown()
+
+    def stats(self) -> dict:
+        return {**self.store.stats(), "allowed": self.allowed, "rejected": self.rejected}
+
+
+# Global instance
+auth_throttle = AuthThrottle(
+    create_bucket_store(
+        settings.AUTH_RATE_LIMIT_BACKEND,
+        settings.AUTH_RATE_LIMIT_SQLITE_PATH,
+        settings.AUTH_RATE_LIMIT_MAX_KEYS
+    ),
+    ip_burst=settings.AUTH_RATE_LIMIT_IP_BURST,
+    ip_per_minute=settings.AUTH_RATE_LIMIT_IP_PER_MINUTE,
+    account_burst=settings.AUTH_RATE_LIMIT_ACCOUNT_BURST,
+    account_per_minute=settings.AUTH_RATE_LIMIT_ACCOUNT_PER_MINUTE
+)
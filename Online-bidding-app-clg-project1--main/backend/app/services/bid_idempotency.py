@@ -0,0 +1,114 @@
+"""
+Bid Idempotency
+Runs each (buyer, Idempotency-Key) bid once and replays its response on retries
+"""
+import asyncio
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.bid import Bid
+from app.models.user import User
+from app.schemas.bid import BidResponse
+from app.services.auction_engine import BidRejected
+from app.utils.cache import TTLCache
+
+
+def _find_bid(buyer_id: int, idempotency_key: str) -> Optional[BidResponse]:
+    """Look up a bid stored under the key (by this or another worker)"""
+    db = SessionLocal()
+    try:
+        row = (
+            db.query(Bid, User.name)
+            .join(User, User.id == Bid.buyer_id)
+            .filter(Bid.buyer_id == buyer_id, Bid.idempotency_key == idempotency_key)
+            .first()
+        )
+        if row is None:
+            return None
+        bid, buyer_name = row
+        response = BidResponse.model_validate(bid)
+        response.buyer_name = buyer_name
+        return response
+    finally:
+        db.close()
+
+
+class BidIdempotency:
+    """
+    Recent responses live in a bounded LRU with TTL; older keys fall back to
+    the unique (buyer_id, idempotency_key) index on bids. Concurrent retries
+    of a request that is still running wait for its result.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.responses = TTLCache(maxsize, ttl)
+        self.in_flight: Dict[Tuple[int, str], asyncio.Future] = {}
+        self.replays = 0
+
+    async def run(
+        self,
+        buyer_id: int,
+        idempotency_key: str,
+        product_id: int,
+        amount: float,
+        place: Callable[[], Awaitable[BidResponse]]
+    ) -> Tuple[BidResponse, bool]:
+        """Return (response, replayed); `place` runs at most once per key"""
+        key = (buyer_id, idempotency_key)
+
+        response = self.responses.get(key)
+        if response is None:
+            pending = self.in_flight.get(key)
+            if pending is not None:
+                response = await asyncio.shield(pending)
+        if response is not None:
+            return self._replay(response, product_id, amount), True
+
+        future = asyncio.get_running_loop().create_future()
+        self.in_flight[key] = future
+        try:
+            response = await run_in_threadpool(_find_bid, buyer_id, idempotency_key)
+            replayed = response is not None
+            if not replayed:
+                try:
+                    response = await place()
+                except BidRejected:
+                    # Another worker may have stored this key between our lookup and write
+                    response = await run_in_threadpool(_find_bid, buyer_id, idempotency_key)
+                    if response is None:
+                        raise
+                    replayed = True
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            # Waiting retries see the same failure; nothing is cached for it
+            future.set_exception(e)
+            future.exception()
+            raise
+        finally:
+            del self.in_flight[key]
+
+        self.responses.set(key, response)
+        future.set_result(response)
+        if replayed:
+            return self._replay(response, product_id, amount), True
+        return response, False
+
+    def _replay(self, response: BidResponse, product_id: int, amount: float) -> BidResponse:
+        if response.product_id != product_id or response.amount != amount:
+            raise BidRejected(
+                "Idempotency-Key was already used for a different bid", status_code=422
+            )
+        self.replays += 1
+        return response
+
+
+# Global instance
+bid_idempotency = BidIdempotency(
+    maxsize=settings.IDEMPOTENCY_CACHE_SIZE,
+    ttl=settings.IDEMPOTENCY_TTL_SECONDS
+)
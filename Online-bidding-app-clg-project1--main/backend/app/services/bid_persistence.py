@@ -0,0 +1,153 @@
+"""
+Bid Persistence
+Writes accepted bids with a compare-and-set on the product row
+"""
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import update, insert
+from sqlalchemy.orm import Session
+
+from app.models.product import Product, AuctionStatus
+from app.models.bid import Bid
+
+
+def claim_current_bid(
+    db: Session,
+    product_id: int,
+    amount: float,
+    leader_id: int,
+    final_amount: Optional[float] = None,
+    min_step: Optional[float] = None
+) -> bool:
+    """
+    Move a product's current bid to `amount` (and its leader to `leader_id`)
+    only if the bid is still valid. The guard replaces the SELECT-then-check,
+    so racing writers cannot lose updates. `final_amount` lets a run of
+    ascending bids claim at once; `min_step` is the smallest raise between
+    consecutive bids of that run, which must also cover the increment.
+    """
+    # An aware UTC timestamp compares correctly on both SQLite and Postgres
+    now = datetime.now(timezone.utc)
+    guards = [
+        Product.id == product_id,
+        Product.status == AuctionStatus.ACTIVE,
+        Product.end_time > now,
+        Product.current_bid + Product.bid_increment <= amount
+    ]
+    if min_step is not None:
+        guards.append(Product.bid_increment <= min_step)
+    result = db.execute(
+        update(Product)
+        .where(*guards)
+        .values(
+            current_bid=final_amount if final_amount is not None else amount,
+            leading_buyer_id=leader_id
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+
+def _stored_idempotency_keys(
+    db: Session,
+    bids: Sequence[Tuple[int, int, float, Optional[str]]]
+) -> Set[Tuple[int, str]]:
+    """(buyer_id, key) pairs of this batch that an earlier request already stored"""
+    keys = {bid[3] for bid in bids if bid[3] is not None}
+    if not keys:
+        return set()
+    rows = db.query(Bid.buyer_id, Bid.idempotency_key).filter(
+        Bid.idempotency_key.in_(keys)
+    ).all()
+    return {(row.buyer_id, row.idempotency_key) for row in rows}
+
+
+def _claim_run(
+    db: Session,
+    product_id: int,
+    bids: Sequence[Tuple[int, int, float, Optional[str]]],
+    indexes: List[int]
+) -> List[int]:
+    """
+    Claim one product's run and return the indexes of the bids that hold.
+    A run that only goes up by at least the increment takes one guarded
+    update; otherwise each bid is guarded on its own, so a bid below the
+    one before it (memory reloaded behind our own pending writes) is
+    dropped instead of lowering the current bid.
+    """
+    amounts = [bids[i][2] for i in indexes]
+    if len(indexes) > 1:
+        min_step = min(b - a for a, b in zip(amounts, amounts[1:]))
+        if min_step > 0 and claim_current_bid(
+            db, product_id, amounts[0], bids[indexes[-1]][1], amounts[-1], min_step
+        ):
+            return indexes
+    return [i for i in indexes if claim_current_bid(db, product_id, bids[i][2], bids[i][1])]
+
+
+def persist_bid_batch(
+    db: Session,
+    bids: Sequence[Tuple[int, int, float, Optional[str]]]
+) -> List[Optional[Bid]]:
+    """
+    Store many (product_id, buyer_id, amount, idempotency_key) bids in one transaction.
+    Bids for a product must arrive in sequencer order; each product's run is
+    claimed with guarded updates (see _claim_run) and all rows go in one
+    multi-row insert. Entries whose product guard failed, or whose
+    idempotency key is already stored, come back as None.
+    """
+    stored_keys = _stored_idempotency_keys(db, bids)
+    runs: Dict[int, List[int]] = {}
+    for index, (product_id, buyer_id, _, idempotency_key) in enumerate(bids):
+        if (buyer_id, idempotency_key) in stored_keys:
+            continue
+        runs.setdefault(product_id, []).append(index)
+
+    results: List[Optional[Bid]] = [None] * len(bids)
+    try:
+        accepted: List[int] = []
+        for product_id, indexes in runs.items():
+            accepted.extend(_claim_run(db, product_id, bids, indexes))
+
+        if accepted:
+            accepted.sort()
+            rows = db.execute(
+                insert(Bid).returning(Bid.id, Bid.timestamp, sort_by_parameter_order=True),
+                [
+                    {
+                        "product_id": bids[i][0],
+                        "buyer_id": bids[i][1],
+                        "amount": bids[i][2],
+                        "idempotency_key": bids[i][3]
+                    }
+                    for i in accepted
+                ]
+            ).all()
+            leading_bids: Dict[int, int] = {}
+            for index, row in zip(accepted, rows):
+                product_id, buyer_id, amount, idempotency_key = bids[index]
+                results[index] = Bid(
+                    id=row.id,
+                    product_id=product_id,
+                    buyer_id=buyer_id,
+                    amount=amount,
+                    timestamp=row.timestamp,
+                    idempotency_key=idempotency_key
+                )
+                leading_bids[product_id] = row.id
+
+            # Bulk update by primary key: the last (highest) accepted bid of each run now leads
+            db.execute(
+                update(Product),
+                [
+                    {"id": product_id, "leading_bid_id": bid_id}
+                    for product_id, bid_id in leading_bids.items()
+                ]
+            )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    return results
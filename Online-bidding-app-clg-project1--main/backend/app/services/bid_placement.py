@@ -0,0 +1,156 @@
+"""
+Bid Placement
+One path for bids from REST and websockets: sequencer, idempotency and notifications
+"""
+import asyncio
+from functools import partial
+from typing import Optional, Set, Tuple
+
+from pydantic import ValidationError
+
+from app.core.config import settings
+from app.core.security import get_token_user
+from app.models.user import UserRole
+from app.schemas.bid import BidCreate, BidResponse
+from app.services.auction_engine import BidOutcome, BidRejected, auction_engine
+from app.services.bid_idempotency import bid_idempotency
+from app.services.websocket_manager import Connection, manager
+
+# Roles that may bid, as on POST /api/bids/
+BIDDER_ROLES = (UserRole.BUYER, UserRole.ADMIN)
+
+# Websocket bids being placed; the loop only keeps weak references to tasks
+_socket_bids: Set[asyncio.Task] = set()
+
+
+async def announce_outcome(outcome: BidOutcome):
+    """Notify the seller and watchers once, about the bid left standing"""
+    final_bid = outcome.final_bid
+    if final_bid is None:
+        return
+    auction = outcome.state
+
+    # Notify seller about new bid
+    await manager.notify_seller(auction.seller_id, {
+        "message": f"New bid of ₹{final_bid.amount} on {auction.title}",
+        "product_id": auction.product_id,
+        "product_title": auction.title,
+        "bid_amount": final_bid.amount,
+        "buyer_name": final_bid.buyer_name,
+        "buyer_id": final_bid.buyer_id
+    })
+
+    # Broadcast to all watchers
+    await manager.broadcast_new_bid(auction.product_id, {
+        "amount": final_bid.amount,
+        "buyer_name": final_bid.buyer_name,
+        "product_id": auction.product_id,
+        "bid_id": final_bid.id,
+        "is_proxy": final_bid is not outcome.bid
+    })
+
+
+async def place_bid(
+    buyer_id: int,
+    buyer_name: str,
+    product_id: int,
+    amount: float,
+    idempotency_key: Optional[str] = None
+) -> Tuple[BidResponse, bool]:
+    """Place a bid and announce it; returns (bid, replayed). Raises BidRejected."""
+    async def place() -> BidResponse:
+        # Bids are ordered and validated by the product's sequencer
+        outcome = await auction_engine.place_bid(
+            product_id, buyer_id, buyer_name, amount, idempotency_key
+        )
+
+        # Send real-time notifications
+        await announce_outcome(outcome)
+
+        return BidResponse.model_validate(outcome.bid)
+
+    if idempotency_key is None:
+        return await place(), False
+    return await bid_idempotency.run(buyer_id, idempotency_key, product_id, amount, place)
+
+
+async def place_socket_bid(
+    connection: Connection,
+    token: Optional[str],
+    product_id: int,
+    message: dict
+):
+    """
+    A place_bid message from a websocket. Same path as POST /api/bids/, with
+    request_id as the Idempotency-Key; answered on the socket with bid_ack or
+    bid_rejected. The socket's token is re-checked per bid (a principal cache
+    hit), so expiry and admin deactivation apply to open sockets too.
+    """
+    request_id = message.get("request_id")
+    reply = {"request_id": request_id, "product_id": product_id}
+    try:
+        if not isinstance(request_id, str) or not 0 < len(request_id) <= 255:
+            raise BidRejected("request_id is required", status_code=422)
+        if token is None:
+            raise BidRejected("Not authenticated", status_code=401)
+        bidder = await get_token_user(token)
+        if bidder is None:
+            raise BidRejected("Could not validate credentials", status_code=401)
+        if bidder.role not in BIDDER_ROLES:
+            raise BidRejected("You don't have permission to access this resource", status_code=403)
+        try:
+            bid_data = BidCreate(product_id=product_id, amount=message.get("amount"))
+        except ValidationError:
+            raise BidRejected("amount must be a number greater than 0", status_code=422)
+
+        bid, replayed = await place_bid(
+            bidder.id, bidder.name, product_id, bid_data.amount, request_id
+        )
+    except BidRejected as e:
+        await manager.send_personal_message({
+            "type": "bid_rejected", **reply, "status": e.status_code, "detail": e.detail
+        }, connection)
+        return
+    except Exception as e:
+        print(f"Error placing websocket bid on product {product_id}: {e}")
+        await manager.send_personal_message({
+            "type": "bid_rejected", **reply, "status": 500, "detail": "Bid could not be placed"
+        }, connection)
+        return
+
+    await manager.send_personal_message({
+        "type": "bid_ack", **reply, "bid": bid.model_dump(mode="json"), "replayed": replayed
+    }, connection)
+
+
+async def dispatch_socket_bid(
+    connection: Connection,
+    token: Optional[str],
+    product_id: int,
+    message: dict
+):
+    """
+    Place a websocket bid in the background, so the socket keeps reading
+    pings and further messages while the bid waits for its group commit.
+    At most WS_MAX_BIDS_IN_FLIGHT per socket; they may be ordered and acked
+    in a different order than sent.
+    """
+    if connection.bids_in_flight >= settings.WS_MAX_BIDS_IN_FLIGHT:
+        await manager.send_personal_message({
+            "type": "bid_rejected",
+            "request_id": message.get("request_id"),
+            "product_id": product_id,
+            "status": 429,
+            "detail": "Too many bids in flight"
+        }, connection)
+        return
+
+    connection.bids_in_flight += 1
+    task = asyncio.create_task(place_socket_bid(connection, token, product_id, message))
+    _socket_bids.add(task)
+    task.add_done_callback(partial(_socket_bid_done, connection))
+
+
+def _socket_bid_done(connection: Connection, task: asyncio.Task):
+    connection.bids_in_flight -= 1
+    _socket_bids.discard(task)
@@ -0,0 +1,181 @@
+"""
+Group-Commit Bid Writer
+Collects accepted bids from every sequencer and commits them in batches
+"""
+import asyncio
+import time
+from collections import deque
+from typing import List, Optional, Sequence, Union
+
+from sqlalchemy.exc import IntegrityError
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.bid import Bid
+from app.services.bid_persistence import persist_bid_batch
+from app.utils.stats import summarize
+
+# Number of recent batches kept for the latency and size summaries
+STATS_WINDOW = 1024
+
+
+def _is_idempotency_conflict(error: IntegrityError) -> bool:
+    """True if the insert lost a race on the unique (buyer_id, idempotency_key) index"""
+    message = str(error.orig)
+    # Postgres names the index, SQLite lists its columns
+    return (
+        "uq_bids_buyer_idempotency_key" in message
+        or "bids.buyer_id, bids.idempotency_key" in message
+    )
+
+
+def _write_one(db, bid: tuple) -> Union[Optional[Bid], IntegrityError]:
+    try:
+        return persist_bid_batch(db, [bid])[0]
+    except IntegrityError as e:
+        return e
+
+
+def _write_batch(bids: Sequence[tuple]) -> List[Union[Optional[Bid], IntegrityError]]:
+    """
+    Write one batch with a short-lived session. If the database refuses a
+    row for good (say a buyer deleted meanwhile), the bids are written one
+    by one in order, so only that bid fails instead of the whole batch.
+    """
+    db = SessionLocal()
+    try:
+        try:
+            return persist_bid_batch(db, bids)
+        except IntegrityError as e:
+            error = e
+        if _is_idempotency_conflict(error):
+            # Another worker stored one of the idempotency keys between our
+            # check and insert; the second attempt drops that bid
+            try:
+                return persist_bid_batch(db, bids)
+            except IntegrityError as e:
+                error = e
+        print(f"Bid batch of {len(bids)} refused ({error}), writing its bids one by one")
+        return [_write_one(db, bid) for bid in bids]
+    finally:
+        db.close()
+
+
+class GroupCommitWriter:
+    """
+    Single writer task: waits up to `window_ms` (or until `max_batch` bids are
+    queued), then writes the whole batch in one transaction. Batches are written
+    strictly in arrival order, so per-product sequencer order is preserved.
+    """
+
+    def __init__(self, window_ms: float, max_batch: int):
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.queue: Optional[asyncio.Queue] = None
+        self.task: Optional[asyncio.Task] = None
+        # True from taking a batch off the queue until its futures are resolved
+        self.in_flight = False
+
+        self.total_batches = 0
+        self.total_bids = 0
+        self.total_conflicts = 0
+        self.max_batch_seen = 0
+        self.batch_sizes = deque(maxlen=STATS_WINDOW)
+        self.commit_latencies_ms = deque(maxlen=STATS_WINDOW)
+
+    def submit(
+        self,
+        product_id: int,
+        buyer_id: int,
+        amount: float,
+        idempotency_key: Optional[str] = None
+    ) -> asyncio.Future:
+        """
+        Queue an accepted bid; the future resolves to the stored Bid,
+        or None when the database guard rejected it
+        """
+        if self.task is None or self.task.done():
+            self.queue = asyncio.Queue()
+            self.task = asyncio.create_task(self._run())
+
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((product_id, buyer_id, amount, idempotency_key, future))
+        return future
+
+    async def _run(self):
+        while True:
+            batch = [await self.queue.get()]
+            self.in_flight = True
+            try:
+                await self._commit(batch)
+            finally:
+                self.in_flight = False
+
+    async def _commit(self, batch: List[tuple]):
+        """Gather more bids behind the first, write them and resolve their futures"""
+        if self.window > 0 and self.queue.qsize() < self.max_batch - 1:
+            await asyncio.sleep(self.window)
+        while len(batch) < self.max_batch and not self.queue.empty():
+            batch.append(self.queue.get_nowait())
+
+        started = time.perf_counter()
+        try:
+            results = await run_in_threadpool(
+                _write_batch, [item[:4] for item in batch]
+            )
+        except Exception as e:
+            print(f"Error committing bid batch of {len(batch)}: {e}")
+            for item in batch:
+                if not item[4].done():
+                    item[4].set_exception(e)
+            return
+
+        self._record(len(batch), time.perf_counter() - started, results)
+        for item, result in zip(batch, results):
+            if item[4].done():
+                continue
+            if isinstance(result, Exception):
+                item[4].set_exception(result)
+            else:
+                item[4].set_result(result)
+
+    def _record(self, size: int, elapsed: float, results: List[Union[Optional[Bid], Exception]]):
+        self.total_batches += 1
+        self.total_bids += size
+        self.total_conflicts += sum(1 for result in results if result is None)
+        self.max_batch_seen = max(self.max_batch_seen, size)
+        self.batch_sizes.append(size)
+        self.commit_latencies_ms.append(elapsed * 1000)
+
+    def stats(self) -> dict:
+        """Batch-size and commit-latency figures for tuning the window"""
+        return {
+            "window_ms": self.window * 1000,
+            "max_batch": self.max_batch,
+            "queue_depth": self.queue.qsize() if self.queue else 0,
+            "total_batches": self.total_batches,
+            "total_bids": self.total_bids,
+            "total_conflicts": self.total_conflicts,
+            "avg_batch_size": self.total_bids / self.total_batches if self.total_batches else 0.0,
+            "max_batch_size": self.max_batch_seen,
+            "recent_batch_size": summarize(self.batch_sizes),
+            "recent_commit_latency_ms": summarize(self.commit_latencies_ms)
+        }
+
+    async def shutdown(self):
+        """Let queued and in-flight bids finish committing, then stop the writer task"""
+        if self.task is None:
+            return
+        while not self.task.done() and (self.in_flight or (self.queue and not self.queue.empty())):
+            await asyncio.sleep(self.window or 0.001)
+        self.task.cancel()
+        await asyncio.gather(self.task, return_exceptions=True)
+        self.task = None
+
+
+# Global instance
+bid_writer = GroupCommitWriter(
+    window_ms=settings.BID_COMMIT_WINDOW_MS,
+    max_batch=settings.BID_COMMIT_MAX_BATCH
+)
@@ -2,21 +2,145 @@
 Google OAuth Service
 Handles Google OAuth authentication flow
 """
-from google.oauth2 import id_token
-from google.auth.transport import requests
+import asyncio
+import re
+import time
+from typing import Dict, Optional, Sequence
+
 import httpx
-from typing import Optional, Dict
+from jose import JWTError, jwt
+
 from app.core.config import settings
 
+# ID tokens are signed with RS256 only
+ALGORITHMS = ["RS256"]
+
+# Certs lifetime when the response carries no usable Cache-Control
+DEFAULT_CERTS_MAX_AGE = 300.0
+
+# Least seconds between refetches forced by an unknown key id
+MIN_CERTS_REFRESH_INTERVAL = 60.0
+
+_MAX_AGE = re.compile(r"max-age=(\d+)")
+
+
+def _cache_lifetime(response: httpx.Response) -> float:
+    """Seconds the response may be reused for, per Cache-Control and Age"""
+    cache_control = response.headers.get("cache-control", "").lower()
+    if "no-store" in cache_control or "no-cache" in cache_control:
+        return 0.0
+    match = _MAX_AGE.search(cache_control)
+    if match is None:
+        return DEFAULT_CERTS_MAX_AGE
+    try:
+        age = float(response.headers.get("age", 0))
+    except ValueError:
+        age = 0.0
+    return max(float(match.group(1)) - age, 0.0)
+
+
+class JWKSCache:
+    """
+    Signing keys by key id, refetched only once Cache-Control says they are
+    stale or a token names a key we don't have (at most once a minute, so
+    forged key ids can't drive refetches). Concurrent misses share one
+    fetch; if a refetch fails, the stale keys keep serving and the next
+    try waits MIN_CERTS_REFRESH_INTERVAL.
+    """
+
+    def __init__(self, service: "GoogleOAuthService", url: str):
+        self.service = service
+        self.url = url
+        self.keys: Dict[str, dict] = {}
+        self.expires_at = 0.0
+        self._fetched_at = 0.0
+        self._lock = asyncio.Lock()
+        self.fetches = 0
+        self.hits = 0
+
+    async def _refresh(self, expires_at: float):
+        async with self._lock:
+            # Another caller refreshed while we waited
+            if self.expires_at != expires_at:
+                return
+            try:
+                response = await self.service.client.get(self.url)
+                response.raise_for_status()
+                keys = {key["kid"]: key for key in response.json()["keys"] if "kid" in key}
+            except (httpx.HTTPError, ValueError, KeyError) as e:
+                if not self.keys:
+                    raise
+                print(f"Refreshing signing keys from {self.url} failed, keeping cached ones: {e}")
+                # Back off, so sign-ins don't each wait out a timeout while the issuer is down
+                now = time.monotonic()
+                self._fetched_at = now
+                self.expires_at = now + MIN_CERTS_REFRESH_INTERVAL
+                return
+            now = time.monotonic()
+            self.fetches += 1
+            self.keys = keys
+            self._fetched_at = now
+            self.expires_at = now + _cache_lifetime(response)
+
+    async def get(self, kid: str) -> Optional[dict]:
+        """The JWK for a key id, or None if the issuer doesn't publish it"""
+        now = time.monotonic()
+        if now >= self.expires_at or (
+            kid not in self.keys and now - self._fetched_at >= MIN_CERTS_REFRESH_INTERVAL
+        ):
+            await self._refresh(self.expires_at)
+        else:
+            self.hits += 1
+        return self.keys.get(kid)
+
+    def stats(self) -> dict:
+        return {
+            "keys": len(self.keys),
+            "fetches": self.fetches,
+            "hits": self.hits,
+            "expires_in": max(self.expires_at - time.monotonic(), 0.0)
+        }
+
 
 class GoogleOAuthService:
-    """Service for handling Google OAuth operations"""
-    
-    def __init__(self):
+    """
+    Service for handling Google OAuth operations.
+    One pooled HTTP client serves every call, so sign-in bursts reuse
+    connections instead of paying a TLS handshake each; ID tokens are
+    verified locally against the cached signing keys.
+    """
+
+    def __init__(
+        self,
+        certs_url: Optional[str] = None,
+        issuers: Optional[Sequence[str]] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
         self.client_id = settings.GOOGLE_CLIENT_ID
         self.client_secret = settings.GOOGLE_CLIENT_SECRET
         self.redirect_uri = settings.GOOGLE_REDIRECT_URI
-        
+        self.token_url = settings.GOOGLE_TOKEN_URL
+        self.user_info_url = settings.GOOGLE_USERINFO_URL
+        # Overridable so tests can stand up a fake issuer
+        self.issuers = list(issuers or settings.google_issuers)
+        self.certs = JWKSCache(self, certs_url or settings.GOOGLE_CERTS_URL)
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """The shared client, created on first use"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=settings.GOOGLE_HTTP_TIMEOUT_SECONDS,
+                limits=httpx.Limits(
+                    max_connections=settings.GOOGLE_HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.GOOGLE_HTTP_MAX_CONNECTIONS
+                ),
+                transport=self._transport
+            )
+        return self._client
+
     def get_authorization_url(self) -> str:
         """
         Generate Google OAuth authorization URL
@@ -30,16 +154,14 @@ class GoogleOAuthService:
             "access_type": "offline",
             "prompt": "consent"
         }
-        
+
         query_string = "&".join([f"{k}={v}" for k, v in params.items()])
         return f"{base_url}?{query_string}"
-    
+
     async def exchange_code_for_token(self, code: str) -> Optional[Dict]:
         """
         Exchange authorization code for access token
         """
-        token_url = "https://oauth2.googleapis.com/token"
-        
         data = {
             "code": code,
             "client_id": self.client_id,
@@ -47,62 +169,80 @@ class GoogleOAuthService:
             "redirect_uri": self.redirect_uri,
             "grant_type": "authorization_code"
         }
-        
-        async with httpx.AsyncClient() as client:
-            response = await client.post(token_url, data=data)
-            
-            if response.status_code == 200:
-                return response.json()
-            return None
-    
-    async def verify_token(self, token: str) -> Optional[Dict]:
+
+        response = await self.client.post(self.token_url, data=data)
+
+        if response.status_code == 200:
+            return response.json()
+        return None
+
+    async def verify_token(self, token: str, access_token: Optional[str] = None) -> Optional[Dict]:
         """
-        Verify Google ID token and extract user info
+        Verify Google ID token and extract user info.
+        Signature, audience, issuer and expiry are checked locally; at_hash
+        too when the access token issued alongside is given. Returns None
+        for invalid tokens; raises httpx.HTTPError if no keys can be fetched.
         """
         try:
-            # Verify the token
-            idinfo = id_token.verify_oauth2_token(
-                token, 
-                requests.Request(), 
-                self.client_id
+            header = jwt.get_unverified_header(token)
+            if header.get("alg") not in ALGORITHMS:
+                return None
+            key = await self.certs.get(header.get("kid"))
+            if key is None:
+                return None
+
+            idinfo = jwt.decode(
+                token,
+                key,
+                algorithms=ALGORITHMS,
+                audience=self.client_id,
+                issuer=self.issuers,
+                access_token=access_token,
+                options={"verify_at_hash": access_token is not None}
             )
-            
-            # Token is valid, return user info
-            return {
-                "google_id": idinfo.get("sub"),
-                "email": idinfo.get("email"),
-                "name": idinfo.get("name"),
-                "profile_picture": idinfo.get("picture"),
-                "email_verified": idinfo.get("email_verified", False)
-            }
-        except ValueError:
+        except JWTError:
             # Invalid token
             return None
-    
+
+        # Token is valid, return user info
+        return {
+            "google_id": idinfo.get("sub"),
+            "email": idinfo.get("email"),
+            "name": idinfo.get("name"),
+            "profile_picture": idinfo.get("picture"),
+            "email_verified": idinfo.get("email_verified", False)
+        }
+
     async def get_user_info(self, access_token: str) -> Optional[Dict]:
         """
         Get user information from Google using access token
         """
-        user_info_url = "https://www.googleapis.com/oauth2/v2/userinfo"
-        
         headers = {
             "Authorization": f"Bearer {access_token}"
         }
-        
-        async with httpx.AsyncClient() as client:
-            response = await client.get(user_info_url, headers=headers)
-            
-            if response.status_code == 200:
-                data = response.json()
-                return {
-                    "google_id": data.get("id"),
-                    "email": data.get("email"),
-                    "name": data.get("name"),
-                    "profile_picture": data.get("picture"),
-                    "email_verified": data.get("verified_email", False)
-                }
-            return None
+
+        response = await self.client.get(self.user_info_url, headers=headers)
+
+        if response.status_code == 200:
+            data = response.json()
+            return {
+                "google_id": data.get("id"),
+                "email": data.get("email"),
+                "name": data.get("name"),
+                "profile_picture": data.get("picture"),
+                "email_verified": data.get("verified_email", False)
+            }
+        return None
+
+    async def shutdown(self):
+        """Close the pooled client"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def stats(self) -> dict:
+        return {"certs": self.certs.stats()}
 
 
 # Singleton instance
-google_oauth_service = GoogleOAuthService()
\ No newline at end of file
+google_oauth_service = GoogleOAuthService()
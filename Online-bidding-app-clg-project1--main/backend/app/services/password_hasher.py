@@ -0,0 +1,108 @@
+"""
+Password Hasher
+Runs bcrypt on a small dedicated thread pool so login bursts never block the event loop
+"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, Tuple
+
+from app.core.config import settings
+from app.core.security import pwd_context
+
+
+class HasherBusy(Exception):
+    """Raised when too many hash/verify calls are already queued or running"""
+
+    def __init__(self, detail: str = "Too many sign-ins in progress, try again shortly"):
+        super().__init__(detail)
+        self.detail = detail
+
+
+class PasswordHasher:
+    """
+    bcrypt releases the GIL, so `workers` threads hash in parallel without
+    touching the event loop or the shared threadpool that sync routes use.
+    Calls beyond `max_pending` queued or running ones are refused instead of
+    piling up.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.pending = 0
+        self.peak_pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.rehashed = 0
+        self._wait_total = 0.0
+        self._run_total = 0.0
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="bcrypt"
+            )
+        return self._executor
+
+    async def _run(self, fn: Callable, *args):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise HasherBusy()
+
+        queued_at = time.perf_counter()
+        self.pending += 1
+        self.peak_pending = max(self.peak_pending, self.pending)
+
+        def timed():
+            started = time.perf_counter()
+            return started, fn(*args), time.perf_counter() - started
+
+        try:
+            started, result, run_s = await asyncio.get_running_loop().run_in_executor(self.executor, timed)
+        finally:
+            self.pending -= 1
+        self.completed += 1
+        self._wait_total += started - queued_at
+        self._run_total += run_s
+        return result
+
+    async def hash(self, password: str) -> str:
+        """Hash a password with the configured cost"""
+        return await self._run(pwd_context.hash, password)
+
+    async def verify_and_update(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        """
+        (valid, new hash). The new hash is set when the stored one was made
+        with a different cost than BCRYPT_ROUNDS; the caller should save it.
+        """
+        valid, new_hash = await self._run(pwd_context.verify_and_update, password, hashed)
+        if new_hash is not None:
+            self.rehashed += 1
+        return valid, new_hash
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "pending": self.pending,
+            "peak_pending": self.peak_pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "rehashed": self.rehashed,
+            "mean_wait_ms": self._wait_total / self.completed * 1000 if self.completed else 0.0,
+            "mean_run_ms": self._run_total / self.completed * 1000 if self.completed else 0.0
+        }
+
+
+# Global instance
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING
+)
@@ -0,0 +1,94 @@
+"""
+Proxy Bidding
+Resolves competing hidden maximum bids in memory
+"""
+import heapq
+from typing import Dict, List, Optional, Tuple
+
+
+class ProxyEntry:
+    """A buyer's hidden maximum on one product"""
+
+    __slots__ = ("buyer_id", "buyer_name", "max_amount", "seq")
+
+    def __init__(self, buyer_id: int, buyer_name: str, max_amount: float, seq: int):
+        self.buyer_id = buyer_id
+        self.buyer_name = buyer_name
+        self.max_amount = max_amount
+        # Registration order (the proxy row id); the earlier proxy wins a tie
+        self.seq = seq
+
+
+class ProxyBook:
+    """
+    Max-heap of proxies for one product, one live entry per buyer.
+    Replaced entries are skipped lazily, so every operation is O(log n).
+    """
+
+    def __init__(self):
+        self.entries: Dict[int, ProxyEntry] = {}
+        self._heap: List[Tuple[float, int, int]] = []
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def register(self, entry: ProxyEntry):
+        """Add or replace a buyer's proxy"""
+        self.entries[entry.buyer_id] = entry
+        heapq.heappush(self._heap, (-entry.max_amount, entry.seq, entry.buyer_id))
+
+    def _pop_live(self) -> Optional[ProxyEntry]:
+        while self._heap:
+            _, seq, buyer_id = heapq.heappop(self._heap)
+            entry = self.entries.get(buyer_id)
+            if entry is not None and entry.seq == seq:
+                return entry
+        return None
+
+    def top_two(self) -> Tuple[Optional[ProxyEntry], Optional[ProxyEntry]]:
+        """The strongest proxy and its strongest rival from another buyer"""
+        first = self._pop_live()
+        second = self._pop_live()
+        for entry in (first, second):
+            if entry is not None:
+                heapq.heappush(self._heap, (-entry.max_amount, entry.seq, entry.buyer_id))
+        return first, second
+
+    def resolve(
+        self,
+        current_bid: float,
+        bid_increment: float,
+        leader_id: Optional[int]
+    ) -> List[Tuple[ProxyEntry, float]]:
+        """
+        Jump straight to the end of the bidding war the proxies would fight.
+        Returns the (proxy, amount) bids to write, in order; each one clears
+        the previous price by at least one increment so the guarded update accepts it.
+        """
+        top, rival = self.top_two()
+        if top is None:
+            return []
+
+        # A rival only matters if it can legally bid above the standing price
+        if rival is not None and rival.max_amount < current_bid + bid_increment:
+            rival = None
+
+        if top.buyer_id == leader_id:
+            if rival is None:
+                return []
+        elif top.max_amount < current_bid + bid_increment:
+            return []
+
+        if rival is None:
+            return [(top, current_bid + bid_increment)]
+
+        if top.max_amount >= rival.max_amount + bid_increment:
+            # The rival is pushed to its maximum, the top proxy answers one step above
+            return [
+                (rival, rival.max_amount),
+                (top, rival.max_amount + bid_increment)
+            ]
+
+        # Too close to outbid by a full step (or a tie): the top proxy takes
+        # the lot at its own maximum
+        return [(top, top.max_amount)]
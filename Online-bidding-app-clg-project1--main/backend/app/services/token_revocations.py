@@ -0,0 +1,137 @@
+"""
+Token Revocations
+Refuses tokens issued before a user was deactivated or deleted, without a query per request
+"""
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.token_revocation import TokenRevocation
+from app.models.user import User
+
+
+# Reason of the rows that let a reactivated user sign in again
+REACTIVATED = "reactivated"
+
+
+class TokenRevocations:
+    """
+    user id -> not-before (epoch seconds), checked against a token's iat on
+    every authenticated request. revoke() and reactivate() write a row in
+    the admin's transaction and apply() updates this worker once it
+    commits; other workers pick new rows up every refresh_interval seconds.
+    Entries older than the token lifetime are dropped, since every token
+    they could refuse has expired anyway.
+    """
+
+    def __init__(self, refresh_interval: float, token_lifetime: float):
+        self.refresh_interval = refresh_interval
+        self.token_lifetime = token_lifetime
+        self.not_before: Dict[int, float] = {}
+        self._last_id = 0
+        self.task: Optional[asyncio.Task] = None
+        self.refused = 0
+
+    def is_revoked(self, user_id: int, issued_at: Optional[float]) -> bool:
+        """Whether a token of this user issued at iat must be refused"""
+        not_before = self.not_before.get(user_id)
+        # Tokens from before millisecond iat have whole seconds: one minted in
+        # the revoking second is refused too
+        if not_before is None or (issued_at is not None and issued_at > not_before):
+            return False
+        self.refused += 1
+        return True
+
+    def revoke(self, db, user_id: int, reason: str) -> Tuple[int, datetime, str]:
+        """Stage a revocation in the caller's transaction; apply() it after commit"""
+        not_before = datetime.utcnow()
+        db.add(TokenRevocation(user_id=user_id, not_before=not_before, reason=reason))
+        return user_id, not_before, reason
+
+    def reactivate(self, db, user_id: int) -> Tuple[int, datetime, str]:
+        """Stage letting a user sign in again; tokens from before stay refused"""
+        return self.revoke(db, user_id, REACTIVATED)
+
+    def apply(self, revocation: Tuple[int, datetime, str]):
+        """Make a committed revocation or reactivation take effect on this worker"""
+        self._remember(*revocation)
+
+    def _remember(self, user_id: int, not_before: datetime, reason: str):
+        epoch = (not_before - datetime(1970, 1, 1)).total_seconds()
+        # Rows are applied in order, so a reactivation is newer than the
+        # revocation it moves up to its own time
+        if reason == REACTIVATED or epoch > self.not_before.get(user_id, 0.0):
+            self.not_before[user_id] = epoch
+
+    def _load(self, initial: bool = False):
+        """Read revocations newer than the last one seen (all live ones at startup)"""
+        db = SessionLocal()
+        try:
+            cutoff = datetime.utcnow() - timedelta(seconds=self.token_lifetime)
+            rows = db.query(
+                TokenRevocation.id,
+                TokenRevocation.user_id,
+                TokenRevocation.not_before,
+                TokenRevocation.reason
+            ).filter(
+                TokenRevocation.id > self._last_id,
+                TokenRevocation.not_before > cutoff
+            ).order_by(TokenRevocation.id).all()
+            # In id order, so a reactivation moves the revocation before it
+            for row_id, user_id, not_before, reason in rows:
+                self._remember(user_id, not_before, reason)
+                self._last_id = row_id
+
+            if initial:
+                # Users deactivated before revocations were recorded
+                now = datetime.utcnow()
+                for (user_id,) in db.query(User.id).filter(User.is_active == False).all():
+                    self._remember(user_id, now, "inactive")
+        finally:
+            db.close()
+
+    def _prune(self):
+        cutoff = time.time() - self.token_lifetime
+        for user_id in [u for u, nb in self.not_before.items() if nb < cutoff]:
+            del self.not_before[user_id]
+
+    async def start(self):
+        """Load live revocations and keep following new ones"""
+        await run_in_threadpool(self._load, True)
+        print(f"Loaded {len(self.not_before)} token revocations")
+        if self.task is None:
+            self.task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await run_in_threadpool(self._load)
+                self._prune()
+            except Exception as e:
+                print(f"Error refreshing token revocations: {e}")
+
+    async def shutdown(self):
+        """Stop the refresh task"""
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+    def stats(self) -> dict:
+        return {
+            "revoked_users": len(self.not_before),
+            "refused": self.refused
+        }
+
+
+# Global instance
+token_revocations = TokenRevocations(
+    refresh_interval=settings.AUTH_REVOCATION_REFRESH_SECONDS,
+    token_lifetime=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+)
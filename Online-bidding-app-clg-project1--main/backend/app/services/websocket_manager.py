@@ -1,75 +1,556 @@
-from typing import Dict, List, Optional
+from typing import Deque, Dict, Hashable, List, Optional, Set, Tuple
+from collections import deque
+from itertools import count
 from fastapi import WebSocket
+import asyncio
 import json
+import secrets
+import time
 from datetime import datetime
 
+from app.core.config import settings
+from app.services.auction_cache import auction_cache
+from app.services.ws_backplane import ROOM, USER, InProcessBackplane, create_backplane
+from app.services.ws_heartbeat import HeartbeatWheel
+from app.services.ws_protocol import JSON, Frame, encode_json, negotiate, receive_message, transcode
+from app.utils.cache import TTLCache
+
+# Slow-consumer policies for a full send queue
+EVICT = "evict"
+CONFLATE = "conflate"
+
+# Message types where a newer message for the same product supersedes older ones
+CONFLATABLE_TYPES = {"new_bid"}
+
+# Room delivery modes a client can ask for
+FULL = "full"
+CONFLATED = "conflated"
+
+# Fields of the latest bid a conflated socket already knows are left out of deltas
+DELTA_FIELDS = ("amount", "buyer_name", "bid_id", "is_proxy")
+
+
+def frame_for(frames: Dict[Tuple[str, str], Frame], text: str, codec: str) -> Frame:
+    """Transcode a message once per codec, however many sockets share it"""
+    frame = frames.get((text, codec))
+    if frame is None:
+        frame = frames[(text, codec)] = transcode(text, codec)
+    return frame
+
+
+class Connection:
+    """
+    One accepted socket: who it belongs to, the rooms it joined and its send
+    queue. The queue and its drain task only exist while frames are pending,
+    so an idle connection costs little more than this record. A conflated
+    connection gets room bids as periodic auction_state summaries; codec is
+    the wire encoding negotiated at connect.
+    """
+
+    __slots__ = (
+        "id", "websocket", "user_id", "rooms", "conflated", "codec",
+        "created_at", "last_seen", "wheel_slot", "queue", "task", "bids_in_flight"
+    )
+
+    def __init__(
+        self,
+        connection_id: int,
+        websocket: WebSocket,
+        user_id: Optional[int],
+        conflated: bool = False,
+        codec: str = JSON
+    ):
+        self.id = connection_id
+        self.websocket = websocket
+        self.user_id = user_id
+        self.rooms: Set[int] = set()
+        self.conflated = conflated
+        self.codec = codec
+        self.created_at = time.monotonic()
+        # Monotonic time of the last frame received; read by the heartbeat wheel
+        self.last_seen = self.created_at
+        self.wheel_slot: Optional[int] = None
+        # (conflation key or None, encoded frame)
+        self.queue: Optional[Deque[Tuple[Optional[Hashable], Frame]]] = None
+        self.task: Optional[asyncio.Task] = None
+        # place_bid messages still waiting for their commit
+        self.bids_in_flight = 0
+
+    @property
+    def pending(self) -> int:
+        return len(self.queue) if self.queue else 0
+
+    def put(self, frame: Frame, key: Optional[Hashable], manager: "ConnectionManager"):
+        if self.queue is None:
+            self.queue = deque()
+        self.queue.append((key, frame))
+        if self.task is None:
+            self.task = asyncio.create_task(self._drain(manager))
+
+    def conflate(self, key: Hashable) -> bool:
+        """Drop queued frames superseded by a newer one with the same key"""
+        kept = deque(item for item in self.queue if item[0] != key)
+        dropped = len(self.queue) - len(kept)
+        self.queue = kept
+        return dropped > 0
+
+    async def _drain(self, manager: "ConnectionManager"):
+        try:
+            while self.queue:
+                _, frame = self.queue.popleft()
+                if isinstance(frame, bytes):
+                    await self.websocket.send_bytes(frame)
+                else:
+                    await self.websocket.send_text(frame)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Error sending to client: {e}")
+            manager.disconnect(self)
+        finally:
+            self.task = None
+            self.queue = None
+
+
+class RoomSummary:
+    """
+    Latest new_bid of a room and the bids folded into it since the last flush.
+    A socket's first flush is a full auction_state; after that it gets
+    auction_delta messages with only the fields that changed.
+    """
+
+    __slots__ = ("latest", "bids", "total_bids", "sent", "synced")
 
-class ConnectionManager:
     def __init__(self):
-        # Store active connections: {product_id: [websockets]}
-        self.active_connections: Dict[int, List[WebSocket]] = {}
-        # Store user-specific connections: {user_id: websocket}
-        self.user_connections: Dict[int, WebSocket] = {}
-        # Store websocket to user mapping
-        self.websocket_to_user: Dict[WebSocket, int] = {}
-    
-    async def connect(self, websocket: WebSocket, product_id: int, user_id: Optional[int] = None):
-        """Accept a new WebSocket connection"""
-        await websocket.accept()
+        # Encoded new_bid message, spliced into the summary as-is
+        self.latest: Optional[str] = None
+        self.bids = 0
+        self.total_bids = 0
+        # Bid fields as of the previous flush
+        self.sent: Dict[str, object] = {}
+        # Connections that received a full auction_state
+        self.synced: Set[int] = set()
+
+    def add(self, text: str):
+        self.latest = text
+        self.bids += 1
+        self.total_bids += 1
+
+    def flush(self, product_id: int) -> Tuple[str, str]:
+        """Encode (auction_state, auction_delta) and start a new interval"""
+        full = (
+            f'{{"type":"auction_state","product_id":{product_id},'
+            f'"bids":{self.bids},"total_bids":{self.total_bids},"latest":{self.latest}}}'
+        )
+        data = json.loads(self.latest).get("data") or {}
+        changes = {
+            field: data[field] for field in DELTA_FIELDS
+            if field in data and self.sent.get(field) != data[field]
+        }
+        self.sent = data
+        delta = encode_json({
+            "type": "auction_delta",
+            "product_id": product_id,
+            "bids": self.bids,
+            "total_bids": self.total_bids,
+            "changes": changes
+        })
+        self.bids = 0
+        return full, delta
+
+
+class RoomLog:
+    """
+    The last room messages of a product, numbered 1, 2, 3... within a stream.
+    A reconnecting client that names the stream and its last seq gets exactly
+    the messages it missed, as long as they are still in the buffer.
+    """
+
+    __slots__ = ("stream", "seq", "events")
+
+    def __init__(self, stream: str, size: int):
+        self.stream = stream
+        self.seq = 0
+        # (seq, encoded message carrying that seq)
+        self.events: Deque[Tuple[int, str]] = deque(maxlen=size)
+
+    def append(self, text: str) -> str:
+        """Number an encoded message and keep it; returns the numbered text"""
+        self.seq += 1
+        text = f'{{"seq":{self.seq},{text[1:]}'
+        self.events.append((self.seq, text))
+        return text
+
+    def since(self, last_seq: int) -> Optional[List[str]]:
+        """Messages after last_seq, or None if some of them are no longer kept"""
+        if last_seq > self.seq or last_seq < 0:
+            return None
+        if last_seq == self.seq:
+            return []
+        if not self.events or last_seq + 1 < self.events[0][0]:
+            return None
+        return [text for seq, text in self.events if seq > last_seq]
+
+
+class ConnectionManager:
+    def __init__(
+        self,
+        send_queue_size: int = 256,
+        slow_consumer_policy: str = CONFLATE,
+        backplane=None,
+        conflation_hz: float = 10.0,
+        heartbeat_interval: float = 20.0,
+        idle_timeout: float = 60.0,
+        replay_buffer_size: int = 128,
+        replay_rooms: int = 1000,
+        replay_ttl: float = 600.0
+    ):
+        # Every accepted socket: {connection_id: Connection}
+        self.connections: Dict[int, Connection] = {}
+        # Product rooms, full-fidelity sockets: {product_id: {connection_id: Connection}}
+        self.rooms: Dict[int, Dict[int, Connection]] = {}
+        # Product rooms, conflated sockets: {product_id: {connection_id: Connection}}
+        self.conflated_rooms: Dict[int, Dict[int, Connection]] = {}
+        # Bids waiting for the next flush, per conflated room
+        self.summaries: Dict[int, RoomSummary] = {}
+        self._dirty: Set[int] = set()
+        self.conflation_hz = conflation_hz
+        self._ticker: Optional[asyncio.Task] = None
+        self.summaries_sent = 0
+        # Pings quiet sockets and reaps the ones that stopped answering (0 disables)
+        self.heartbeat = HeartbeatWheel(heartbeat_interval, idle_timeout) if heartbeat_interval > 0 else None
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self.pings_sent = 0
+        self.reaped = 0
+        # Recent room messages for resuming clients; outlive the room by replay_ttl
+        self.room_logs = TTLCache(replay_rooms, replay_ttl)
+        self.replay_buffer_size = replay_buffer_size
+        # Streams are per worker: a client resuming on another worker gets a snapshot
+        self._stream_prefix = secrets.token_hex(4)
+        self._stream_ids = count(1)
+        self.replayed = 0
+        self.snapshots = 0
+        self.resyncs = 0
+        # All sockets of a user (tabs, devices): {user_id: {connection_id: Connection}}
+        self.user_connections: Dict[int, Dict[int, Connection]] = {}
+        self._ids = count(1)
+        self.send_queue_size = send_queue_size
+        self.slow_consumer_policy = slow_consumer_policy
+        self.conflated = 0
+        self.evicted = 0
+        # Carries broadcasts to the other workers; delivery to sockets stays local
+        self.backplane = backplane or InProcessBackplane()
+        self.backplane.deliver = self._deliver
+        self.backplane.resync = self._resync
+    
+    async def start(self):
+        """Start the cross-worker backplane, the conflation ticker and the heartbeat wheel"""
+        await self.backplane.start()
+        if self.conflation_hz > 0:
+            self._ticker = asyncio.create_task(self._flush_loop())
+        if self.heartbeat is not None:
+            self._heartbeat_task = asyncio.create_task(self._heartbeat_loop())
+    
+    async def shutdown(self):
+        """Stop the tickers and the backplane and drop every connection"""
+        for task in (self._ticker, self._heartbeat_task):
+            if task is not None:
+                task.cancel()
+        self._ticker = self._heartbeat_task = None
+        await self.backplane.shutdown()
+        for connection in list(self.connections.values()):
+            self.disconnect(connection)
+    
+    async def connect(
+        self,
+        websocket: WebSocket,
+        product_id: Optional[int] = None,
+        user_id: Optional[int] = None,
+        mode: str = FULL
+    ) -> Connection:
+        """Accept a new WebSocket connection, negotiating its wire codec"""
+        codec, subprotocol = negotiate(websocket)
+        await websocket.accept(subprotocol=subprotocol)
         
-        if product_id not in self.active_connections:
-            self.active_connections[product_id] = []
+        # Without a ticker there is nothing to flush summaries, so stay full-fidelity
+        conflated = mode == CONFLATED and self.conflation_hz > 0
+        connection = Connection(next(self._ids), websocket, user_id, conflated, codec)
+        self.connections[connection.id] = connection
+        if self.heartbeat is not None:
+            self.heartbeat.add(connection)
         
-        self.active_connections[product_id].append(websocket)
+        # Register every socket of a user, not just the latest one
+        if user_id is not None:
+            self.user_connections.setdefault(user_id, {})[connection.id] = connection
         
-        # Store user-specific connection if user_id provided
-        if user_id:
-            self.user_connections[user_id] = websocket
-            self.websocket_to_user[websocket] = user_id
+        if product_id is not None:
+            self.join(connection, product_id)
+            print(f"Client connected to product {product_id}. Total connections: {self.get_active_connections_count(product_id)}")
         
-        print(f"Client connected to product {product_id}. Total connections: {len(self.active_connections[product_id])}")
-    
-    def disconnect(self, websocket: WebSocket, product_id: int):
-        """Remove a WebSocket connection"""
-        if product_id in self.active_connections:
-            if websocket in self.active_connections[product_id]:
-                self.active_connections[product_id].remove(websocket)
-                print(f"Client disconnected from product {product_id}. Remaining: {len(self.active_connections[product_id])}")
-            
+        return connection
+    
+    def join(self, connection: Connection, product_id: int):
+        """Add a connection to a product room"""
+        self.room_log(product_id)
+        rooms = self.conflated_rooms if connection.conflated else self.rooms
+        rooms.setdefault(product_id, {})[connection.id] = connection
+        connection.rooms.add(product_id)
+    
+    def leave(self, connection: Connection, product_id: int):
+        """Remove a connection from a product room"""
+        connection.rooms.discard(product_id)
+        rooms = self.conflated_rooms if connection.conflated else self.rooms
+        room = rooms.get(product_id)
+        if room is not None and room.pop(connection.id, None) is not None:
+            if connection.conflated and product_id in self.summaries:
+                self.summaries[product_id].synced.discard(connection.id)
             # Clean up empty product rooms
-            if len(self.active_connections[product_id]) == 0:
-                del self.active_connections[product_id]
+            if not room:
+                del rooms[product_id]
+                if connection.conflated:
+                    self.summaries.pop(product_id, None)
+                    self._dirty.discard(product_id)
+    
+    def disconnect(self, connection: Connection):
+        """Remove a WebSocket connection from every room and the user index"""
+        if self.connections.pop(connection.id, None) is None:
+            return
+        
+        if self.heartbeat is not None:
+            self.heartbeat.remove(connection)
+        if connection.task is not None and connection.task is not asyncio.current_task():
+            connection.task.cancel()
+        connection.queue = None
+        
+        for product_id in list(connection.rooms):
+            self.leave(connection, product_id)
+            print(f"Client disconnected from product {product_id}. Remaining: {self.get_active_connections_count(product_id)}")
         
         # Clean up user connections
-        if websocket in self.websocket_to_user:
-            user_id = self.websocket_to_user[websocket]
-            if user_id in self.user_connections:
-                del self.user_connections[user_id]
-            del self.websocket_to_user[websocket]
+        if connection.user_id is not None:
+            sockets = self.user_connections.get(connection.user_id)
+            if sockets is not None:
+                sockets.pop(connection.id, None)
+                if not sockets:
+                    del self.user_connections[connection.user_id]
     
-    async def send_personal_message(self, message: dict, websocket: WebSocket):
-        """Send a message to a specific client"""
+    def _enqueue(self, connection: Connection, frame: Frame, key: Optional[Hashable] = None):
+        """Queue a frame without waiting; apply the slow-consumer policy on overflow"""
+        if connection.pending >= self.send_queue_size:
+            if self.slow_consumer_policy == CONFLATE and key is not None and connection.conflate(key):
+                self.conflated += 1
+            else:
+                self.evicted += 1
+                print(f"Evicting slow client ({connection.pending} frames queued)")
+                self.disconnect(connection)
+                asyncio.create_task(self._close(connection.websocket, 1013, "Too slow"))
+                return
+        connection.put(frame, key, self)
+    
+    def _deliver(self, target: str, target_id: int, message_type: str, text: str):
+        """Hand an encoded message to this worker's sockets (called by the backplane)"""
+        if target == ROOM:
+            log = self.room_logs.get(target_id)
+            if log is not None:
+                text = log.append(text)
+                # Refresh the log's TTL while the room is busy
+                self.room_logs.set(target_id, log)
+            if target_id in self.conflated_rooms:
+                self._deliver_conflated(target_id, message_type, text)
+            connections = self.rooms.get(target_id)
+            key = (message_type, target_id) if message_type in CONFLATABLE_TYPES else None
+        else:
+            connections = self.user_connections.get(target_id)
+            key = None
+        if not connections:
+            return
+        
+        # Each socket's drain task does the sending; encode once per codec
+        frames = {}
+        for connection in list(connections.values()):
+            self._enqueue(connection, frame_for(frames, text, connection.codec), key)
+    
+    def _resync(self, target: str, target_id: int):
+        """
+        Another worker lost messages for this room or user (called by the
+        backplane). A room's sockets get a fresh snapshot on a new stream;
+        a user's notifications can't be replayed, so its sockets are closed
+        and the client reconnects. Nothing else on this worker is touched.
+        """
+        self.resyncs += 1
+        if target == ROOM:
+            if target_id in self.rooms or target_id in self.conflated_rooms:
+                asyncio.create_task(self._resync_room(target_id))
+            else:
+                # Nobody watching: just stop offering resumes from a log with a hole
+                self.room_logs.pop(target_id)
+            return
+        
+        connections = list(self.user_connections.get(target_id, {}).values())
+        for connection in connections:
+            self.disconnect(connection)
+            asyncio.create_task(self._close(connection.websocket, 1012, "Missed updates, reconnect"))
+        if connections:
+            print(f"Backplane lost messages for user {target_id}; closed their {len(connections)} WebSocket connections")
+    
+    async def _resync_room(self, product_id: int):
+        """Send every socket of a room the current auction as a snapshot on a new stream"""
         try:
-            await websocket.send_json(message)
+            # The bid we missed may also be missing from our cached copy
+            auction_cache.invalidate(product_id)
+            state = await auction_cache.load(product_id)
         except Exception as e:
-            print(f"Error sending personal message: {e}")
+            print(f"Error resyncing product {product_id}: {e}")
+            state = None
+        
+        # No await from here on, so no live message can land between the new log and the snapshot
+        self.room_logs.pop(product_id)
+        connections = list(self.rooms.get(product_id, {}).values())
+        connections += self.conflated_rooms.get(product_id, {}).values()
+        if state is None or not connections:
+            return
+        summary = self.summaries.get(product_id)
+        if summary is not None:
+            summary.synced.clear()
+        
+        log = self.room_log(product_id)
+        text = encode_json({
+            "type": "resync",
+            "product_id": product_id,
+            "stream": log.stream,
+            "seq": log.seq,
+            "resumed": False,
+            "auction": state.to_response().model_dump(mode="json")
+        })
+        self.snapshots += len(connections)
+        frames = {}
+        for connection in connections:
+            self._enqueue(connection, frame_for(frames, text, connection.codec))
     
-    async def broadcast_to_product(self, message: dict, product_id: int):
-        """Broadcast a message to all clients watching a specific product"""
-        if product_id not in self.active_connections:
+    def _deliver_conflated(self, product_id: int, message_type: str, text: str):
+        """Fold bids into the room summary; anything else goes out after it"""
+        if message_type in CONFLATABLE_TYPES:
+            self.summaries.setdefault(product_id, RoomSummary()).add(text)
+            self._dirty.add(product_id)
+            return
+        
+        # Conflated sockets must see the final price before e.g. auction_ended
+        self._flush_room(product_id)
+        frames = {}
+        for connection in list(self.conflated_rooms.get(product_id, {}).values()):
+            self._enqueue(connection, frame_for(frames, text, connection.codec))
+    
+    def _flush_room(self, product_id: int):
+        """Send a room's pending summary to its conflated sockets"""
+        if product_id not in self._dirty:
+            return
+        self._dirty.discard(product_id)
+        connections = self.conflated_rooms.get(product_id)
+        summary = self.summaries.get(product_id)
+        if not connections or summary is None:
             return
         
-        disconnected = []
-        for connection in self.active_connections[product_id]:
+        full, delta = summary.flush(product_id)
+        self.summaries_sent += 1
+        frames = {}
+        for connection in list(connections.values()):
+            if connection.id in summary.synced:
+                # Deltas build on each other, so none may be conflated away
+                text, key = delta, None
+            else:
+                # A newer full state replaces one still queued
+                text, key = full, ("auction_state", product_id)
+                summary.synced.add(connection.id)
+            self._enqueue(connection, frame_for(frames, text, connection.codec), key)
+    
+    async def _flush_loop(self):
+        """Flush every room with new bids at conflation_hz"""
+        interval = 1 / self.conflation_hz
+        while True:
+            await asyncio.sleep(interval)
+            for product_id in list(self._dirty):
+                try:
+                    self._flush_room(product_id)
+                except Exception as e:
+                    print(f"Error flushing auction state for product {product_id}: {e}")
+    
+    def room_log(self, product_id: int) -> RoomLog:
+        """The product's message log, started when the first socket joins here"""
+        log = self.room_logs.get(product_id)
+        if log is None:
+            log = RoomLog(f"{self._stream_prefix}-{next(self._stream_ids)}", self.replay_buffer_size)
+            self.room_logs.set(product_id, log)
+        return log
+    
+    def missed_messages(
+        self,
+        connection: Connection,
+        product_id: int,
+        stream: Optional[str],
+        last_seq: Optional[int]
+    ) -> Optional[List[str]]:
+        """
+        Room messages a reconnecting client missed, or None when the gap is
+        unknown or too large and it needs a snapshot instead
+        """
+        log = self.room_logs.get(product_id)
+        missed = None
+        # Conflated sockets resync from their first auction_state instead
+        if log is not None and stream == log.stream and last_seq is not None and not connection.conflated:
+            missed = log.since(last_seq)
+        if missed is None:
+            self.snapshots += 1
+        return missed
+    
+    def replay(self, connection: Connection, messages: List[str]):
+        """Queue missed room messages, oldest first"""
+        self.replayed += len(messages)
+        frames = {}
+        for text in messages:
+            self._enqueue(connection, frame_for(frames, text, connection.codec))
+    
+    async def _heartbeat_loop(self):
+        """Advance the heartbeat wheel one slot per tick"""
+        ping = encode_json({"type": "ping"})
+        while True:
+            await asyncio.sleep(self.heartbeat.tick)
             try:
-                await connection.send_json(message)
+                to_ping, to_reap = self.heartbeat.advance(time.monotonic())
+                frames = {}
+                for connection in to_ping:
+                    self.pings_sent += 1
+                    self._enqueue(connection, frame_for(frames, ping, connection.codec))
+                for connection in to_reap:
+                    # Idle or half-open: nothing received for idle_timeout
+                    self.reaped += 1
+                    self.disconnect(connection)
+                    asyncio.create_task(self._close(connection.websocket, 1001, "Idle timeout"))
+                if to_reap:
+                    print(f"Reaped {len(to_reap)} idle WebSocket connections")
             except Exception as e:
-                print(f"Error broadcasting to client: {e}")
-                disconnected.append(connection)
-        
-        # Remove disconnected clients
-        for connection in disconnected:
-            self.disconnect(connection, product_id)
+                print(f"Error in WebSocket heartbeat: {e}")
+    
+    async def _close(self, websocket: WebSocket, code: int, reason: str):
+        try:
+            await websocket.close(code=code, reason=reason)
+        except Exception:
+            pass
+    
+    async def receive(self, connection: Connection) -> dict:
+        """Wait for the client's next message, decoded with its codec"""
+        message = await receive_message(connection.websocket, connection.codec)
+        connection.last_seen = time.monotonic()
+        return message
+    
+    async def send_personal_message(self, message: dict, connection: Connection):
+        """Send a message to a specific client"""
+        if connection.id in self.connections:
+            self._enqueue(connection, transcode(encode_json(message), connection.codec))
+    
+    async def broadcast_to_product(self, message: dict, product_id: int):
+        """Broadcast a message to all clients watching a specific product, on every worker"""
+        # Serialize once; the backplane publishes it once per worker
+        self.backplane.publish(ROOM, product_id, message.get("type", ""), encode_json(message))
     
     async def broadcast_new_bid(self, product_id: int, bid_data: dict):
         """Broadcast a new bid to all watchers"""
@@ -92,12 +573,8 @@ class ConnectionManager:
         await self.broadcast_to_product(message, product_id)
     
     async def send_to_user(self, user_id: int, message: dict):
-        """Send a message to a specific user"""
-        if user_id in self.user_connections:
-            try:
-                await self.user_connections[user_id].send_json(message)
-            except Exception as e:
-                print(f"Error sending message to user {user_id}: {e}")
+        """Send a message to every socket of a specific user, on every worker"""
+        self.backplane.publish(USER, user_id, message.get("type", ""), encode_json(message))
     
     async def notify_seller(self, seller_id: int, notification_data: dict):
         """Send notification to seller about new bid"""
@@ -129,8 +606,38 @@ class ConnectionManager:
     
     def get_active_connections_count(self, product_id: int) -> int:
         """Get number of active connections for a product"""
-        return len(self.active_connections.get(product_id, []))
+        return len(self.rooms.get(product_id, ())) + len(self.conflated_rooms.get(product_id, ()))
+    
+    def stats(self) -> dict:
+        """Connection and send-queue figures"""
+        return {
+            "rooms": len(self.rooms.keys() | self.conflated_rooms.keys()),
+            "connections": len(self.connections),
+            "conflated_connections": sum(len(room) for room in self.conflated_rooms.values()),
+            "users": len(self.user_connections),
+            "queued_frames": sum(c.pending for c in self.connections.values()),
+            "summaries_sent": self.summaries_sent,
+            "conflated": self.conflated,
+            "evicted": self.evicted,
+            "pings_sent": self.pings_sent,
+            "reaped": self.reaped,
+            "room_logs": len(self.room_logs),
+            "replayed": self.replayed,
+            "snapshots": self.snapshots,
+            "resyncs": self.resyncs,
+            "backplane": self.backplane.stats()
+        }
 
 
 # Global instance
-manager = ConnectionManager()
\ No newline at end of file
+manager = ConnectionManager(
+    send_queue_size=settings.WS_SEND_QUEUE_SIZE,
+    slow_consumer_policy=settings.WS_SLOW_CONSUMER_POLICY,
+    backplane=create_backplane(settings.WS_BACKPLANE, settings.WS_BACKPLANE_DIR),
+    conflation_hz=settings.WS_CONFLATION_HZ,
+    heartbeat_interval=settings.WS_HEARTBEAT_INTERVAL_SECONDS,
+    idle_timeout=settings.WS_IDLE_TIMEOUT_SECONDS,
+    replay_buffer_size=settings.WS_REPLAY_BUFFER_SIZE,
+    replay_rooms=settings.WS_REPLAY_ROOMS,
+    replay_ttl=settings.WS_REPLAY_TTL_SECONDS
+)
@@ -0,0 +1,319 @@
+"""
+WebSocket Backplane
+Carries room and user messages to every worker process once per worker
+"""
+import asyncio
+import json
+import os
+import socket
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Set, Tuple
+
+# Envelope targets
+ROOM = "room"
+USER = "user"
+# Unnumbered notice listing the rooms and users a peer lost messages for
+LOST = "lost"
+
+# Largest frame one datagram may carry
+MAX_DATAGRAM = 64 * 1024
+
+# Socket buffer asked for in each direction, so bursts queue in the kernel
+SOCKET_BUFFER = 4 * 1024 * 1024
+
+# Seconds between rescans of the peer directory
+PEER_REFRESH_INTERVAL = 1.0
+
+# Datagrams kept per peer whose receive buffer is full, and how often they are retried
+PEER_BACKLOG = 4096
+BACKLOG_RETRY_INTERVAL = 0.005
+
+# Rooms and users named per lost notice, so one always fits a datagram
+LOST_PER_NOTICE = 1000
+
+# deliver(target, target_id, message_type, text)
+Deliver = Callable[[str, int, str, str], None]
+
+# resync(target, target_id): messages for that room or user were lost
+Resync = Callable[[str, int], None]
+
+# (target, target_id) a message was addressed to
+Key = Tuple[str, int]
+
+
+def encode_envelope(
+    sender: int,
+    seq: int,
+    target: str,
+    target_id: int,
+    message_type: str,
+    text: str
+) -> bytes:
+    """
+    Header line plus the already encoded message, so receivers never re-encode.
+    seq numbers the sender's datagrams so a receiver can tell it missed
+    some; lost notices carry 0.
+    """
+    return f"{sender} {seq} {target} {target_id} {message_type}\n{text}".encode("utf-8")
+
+
+def decode_envelope(data: bytes):
+    header, text = data.decode("utf-8").split("\n", 1)
+    sender, seq, target, target_id, message_type = header.split(" ", 4)
+    return int(sender), int(seq), target, int(target_id), message_type, text
+
+
+class InProcessBackplane:
+    """Single worker: publishing is local delivery"""
+
+    name = "memory"
+
+    def __init__(self):
+        # Set by the ConnectionManager that owns this backplane
+        self.deliver: Optional[Deliver] = None
+        self.resync: Optional[Resync] = None
+
+    async def start(self):
+        pass
+
+    def publish(self, target: str, target_id: int, message_type: str, text: str):
+        self.deliver(target, target_id, message_type, text)
+
+    async def shutdown(self):
+        pass
+
+    def stats(self) -> dict:
+        return {"backend": self.name}
+
+
+class UnixSocketBackplane:
+    """
+    Several workers on one host: each binds a datagram socket in a shared
+    directory and publishes every message to its peers' sockets, then
+    delivers it locally. Peers that went away are pruned on the first
+    failed send. A peer whose receive buffer is full gets its datagrams
+    queued and retried in order. A message that still can't reach a peer
+    (its backlog overflowed, the send failed or it is too large) is not
+    lost silently: the peer is sent a notice naming its room or user, and
+    calls resync() for just those.
+    """
+
+    name = "unix"
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.path: Optional[str] = None
+        self.sock: Optional[socket.socket] = None
+        self.deliver: Optional[Deliver] = None
+        # Set by the ConnectionManager: called for each room or user a peer lost messages for
+        self.resync: Optional[Resync] = None
+        self._peers: List[str] = []
+        self._peers_checked = 0.0
+        self._seq = 0
+        # Last sequence number received from each sender pid
+        self._received_seq: Dict[int, int] = {}
+        self._backlog: Dict[str, Deque[Tuple[Key, bytes]]] = {}
+        # Peers whose backlog overflowed since it last drained, to log once per episode
+        self._overflowing: Set[str] = set()
+        # Rooms and users each peer lost messages for, until a notice reaches it
+        self._lost: Dict[str, Set[Key]] = {}
+        self._retry: Optional[asyncio.TimerHandle] = None
+        self.published = 0
+        self.received = 0
+        self.queued = 0
+        self.dropped = 0
+        self.oversized = 0
+        self.gaps = 0
+
+    async def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self.path = os.path.join(self.directory, f"worker-{os.getpid()}.sock")
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        for option in (socket.SO_SNDBUF, socket.SO_RCVBUF):
+            try:
+                self.sock.setsockopt(socket.SOL_SOCKET, option, SOCKET_BUFFER)
+            except OSError:
+                pass
+        self.sock.bind(self.path)
+        self.sock.setblocking(False)
+        asyncio.get_running_loop().add_reader(self.sock.fileno(), self._on_readable)
+        print(f"WebSocket backplane listening on {self.path}")
+
+    def _on_readable(self):
+        while True:
+            try:
+                data = self.sock.recv(MAX_DATAGRAM + 1)
+            except (BlockingIOError, InterruptedError):
+                return
+            self.received += 1
+            try:
+                sender, seq, target, *message = decode_envelope(data)
+                if target == LOST:
+                    for lost_target, lost_id in json.loads(message[-1]):
+                        if self.resync is not None:
+                            self.resync(lost_target, lost_id)
+                    continue
+                last = self._received_seq.get(sender)
+                self._received_seq[sender] = seq
+                if last is not None and seq != last + 1:
+                    # The sender's lost notice says which rooms and users to resync
+                    self.gaps += 1
+                    print(f"Backplane missed {seq - last - 1} messages from worker {sender}")
+                self.deliver(target, *message)
+            except Exception as e:
+                print(f"Error delivering backplane message: {e}")
+
+    def _peer_paths(self) -> List[str]:
+        now = time.monotonic()
+        if now - self._peers_checked >= PEER_REFRESH_INTERVAL:
+            self._peers_checked = now
+            self._peers = [
+                os.path.join(self.directory, name)
+                for name in os.listdir(self.directory)
+                if name.endswith(".sock") and os.path.join(self.directory, name) != self.path
+            ]
+        return self._peers
+
+    def _forget_peer(self, path: str):
+        """The worker behind this socket is gone"""
+        if path in self._peers:
+            self._peers.remove(path)
+        self._backlog.pop(path, None)
+        self._overflowing.discard(path)
+        self._lost.pop(path, None)
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+    def _send(self, path: str, data: bytes, key: Optional[Key]) -> bool:
+        """Try one datagram; False if the peer's buffer is full"""
+        try:
+            self.sock.sendto(data, path)
+        except (BlockingIOError, InterruptedError):
+            return False
+        except (ConnectionRefusedError, FileNotFoundError):
+            self._forget_peer(path)
+        except OSError as e:
+            print(f"Backplane send to {path} failed: {e}")
+            self._lose(path, key)
+        return True
+
+    def _lose(self, path: str, key: Optional[Key]):
+        """Remember that a peer missed a message, to tell it once it has room"""
+        self.dropped += 1
+        if key is not None:
+            self._lost.setdefault(path, set()).add(key)
+            self._schedule_retry()
+
+    def _schedule_retry(self):
+        if self._retry is None:
+            self._retry = asyncio.get_running_loop().call_later(
+                BACKLOG_RETRY_INTERVAL, self._flush_backlog
+            )
+
+    def _enqueue(self, path: str, key: Key, data: bytes):
+        backlog = self._backlog.setdefault(path, deque())
+        if len(backlog) >= PEER_BACKLOG:
+            lost_key, _ = backlog.popleft()
+            self._lose(path, lost_key)
+            if path not in self._overflowing:
+                self._overflowing.add(path)
+                print(f"Backplane backlog for {path} is full, dropping its oldest messages")
+        backlog.append((key, data))
+        self.queued += 1
+        self._schedule_retry()
+
+    def _report_lost(self, path: str) -> bool:
+        """Send a peer the rooms and users it lost messages for; False if its buffer is full"""
+        lost = self._lost[path]
+        # Stops early if a send finds the peer gone (which forgets its losses)
+        while lost and path in self._lost:
+            keys = [lost.pop() for _ in range(min(len(lost), LOST_PER_NOTICE))]
+            data = encode_envelope(os.getpid(), 0, LOST, 0, "", json.dumps(keys))
+            if not self._send(path, data, None):
+                lost.update(keys)
+                return False
+        self._lost.pop(path, None)
+        return True
+
+    def _flush_backlog(self):
+        """Resend queued datagrams in order until a peer's buffer fills again"""
+        self._retry = None
+        if self.sock is None:
+            return
+        for path, backlog in list(self._backlog.items()):
+            while backlog and self._send(path, backlog[0][1], backlog[0][0]):
+                backlog.popleft()
+            if not backlog:
+                self._backlog.pop(path, None)
+                self._overflowing.discard(path)
+        for path in list(self._lost):
+            # After the backlog, so the peer resyncs once it has caught up
+            if path not in self._backlog:
+                self._report_lost(path)
+        if self._backlog or self._lost:
+            self._schedule_retry()
+
+    def publish(self, target: str, target_id: int, message_type: str, text: str):
+        self.deliver(target, target_id, message_type, text)
+        if self.sock is None:
+            return
+
+        key = (target, target_id)
+        data = encode_envelope(os.getpid(), self._seq + 1, target, target_id, message_type, text)
+        if len(data) > MAX_DATAGRAM:
+            self.oversized += 1
+            print(f"Backplane message {message_type} is {len(data)} bytes, over {MAX_DATAGRAM}; peers resync {target} {target_id}")
+            for path in list(self._peer_paths()):
+                self._lose(path, key)
+            return
+
+        # Only datagrams actually sent are numbered, so a gap means one was lost
+        self._seq += 1
+        self.published += 1
+        for path in list(self._peer_paths()):
+            # Behind a backlog, keep the order
+            if path in self._backlog or not self._send(path, data, key):
+                self._enqueue(path, key, data)
+
+    async def shutdown(self):
+        if self.sock is None:
+            return
+        if self._retry is not None:
+            self._retry.cancel()
+            self._retry = None
+        asyncio.get_running_loop().remove_reader(self.sock.fileno())
+        self.sock.close()
+        self.sock = None
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.name,
+            "peers": len(self._peers),
+            "published": self.published,
+            "received": self.received,
+            "queued": self.queued,
+            "backlog": sum(len(backlog) for backlog in self._backlog.values()),
+            "lost_pending": sum(len(lost) for lost in self._lost.values()),
+            "dropped": self.dropped,
+            "oversized": self.oversized,
+            "gaps": self.gaps
+        }
+
+
+def create_backplane(backend: str, directory: str):
+    """Build the backplane named by settings.WS_BACKPLANE"""
+    if backend == UnixSocketBackplane.name:
+        return UnixSocketBackplane(directory)
+    if backend == InProcessBackplane.name:
+        return InProcessBackplane()
+    raise ValueError(f"Unknown WS_BACKPLANE: {backend}")
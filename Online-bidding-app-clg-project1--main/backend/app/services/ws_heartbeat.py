@@ -0,0 +1,49 @@
+"""
+WebSocket Heartbeats
+One timer wheel checks every socket once per heartbeat interval
+"""
+import math
+from typing import Dict, List, Tuple
+
+
+class HeartbeatWheel:
+    """
+    Sockets are spread over interval/tick slots and the ticker visits one slot
+    per tick, so each socket is checked once per interval without a timer of
+    its own. Received frames only bump connection.last_seen; the wheel reads
+    it lazily when the socket's slot comes round.
+    """
+
+    def __init__(self, interval: float, idle_timeout: float, tick: float = 1.0):
+        self.interval = interval
+        self.idle_timeout = idle_timeout
+        self.tick = tick
+        self.slots: List[Dict[int, object]] = [
+            {} for _ in range(max(1, math.ceil(interval / tick)))
+        ]
+        self.cursor = 0
+
+    def add(self, connection):
+        """Schedule a connection; its first check is one interval away"""
+        connection.wheel_slot = self.cursor
+        self.slots[self.cursor][connection.id] = connection
+
+    def remove(self, connection):
+        if connection.wheel_slot is not None:
+            self.slots[connection.wheel_slot].pop(connection.id, None)
+            connection.wheel_slot = None
+
+    def advance(self, now: float) -> Tuple[list, list]:
+        """Visit the next slot; return (connections to ping, connections to reap)"""
+        self.cursor = (self.cursor + 1) % len(self.slots)
+        due = self.slots[self.cursor]
+        to_ping, to_reap = [], []
+        for connection in list(due.values()):
+            idle = now - connection.last_seen
+            if idle >= self.idle_timeout:
+                to_reap.append(connection)
+            elif idle >= self.interval - self.tick:
+                # Quiet for a whole interval: make the client answer
+                to_ping.append(connection)
+        # Survivors stay in this slot and are checked again one interval later
+        return to_ping, to_reap
@@ -0,0 +1,108 @@
+"""
+WebSocket Wire Protocol
+Negotiates JSON or compact MessagePack frames per socket
+"""
+import json
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple, Union
+
+import msgpack
+
+# Codecs
+JSON = "json"
+MSGPACK = "msgpack"
+
+# Sec-WebSocket-Protocol values a client may offer, in server preference order
+SUBPROTOCOLS = {
+    "bidding.msgpack.v1": MSGPACK,
+    "bidding.json.v1": JSON
+}
+
+# Numeric codes replacing the "type" string in MessagePack frames; 0 = carried in the body
+TYPE_CODES = {
+    "connected": 1,
+    "ping": 2,
+    "pong": 3,
+    "new_bid": 4,
+    "auction_state": 5,
+    "auction_delta": 6,
+    "auction_ended": 7,
+    "product_sold": 8,
+    "seller_notification": 9,
+    "buyer_notification": 10,
+    "place_bid": 11,
+    "bid_ack": 12,
+    "bid_rejected": 13,
+    "subscribe": 14,
+    "unsubscribe": 15,
+    "subscribed": 16,
+    "unsubscribed": 17,
+    "error": 18
+}
+TYPE_NAMES = {code: name for name, code in TYPE_CODES.items()}
+
+Frame = Union[str, bytes]
+
+
+def negotiate(websocket) -> Tuple[str, Optional[str]]:
+    """Pick (codec, subprotocol to echo) from the client's offered subprotocols"""
+    offered = websocket.scope.get("subprotocols") or ()
+    for subprotocol, codec in SUBPROTOCOLS.items():
+        if subprotocol in offered:
+            return codec, subprotocol
+    return JSON, None
+
+
+def encode_json(message: dict) -> str:
+    """Serialize a message once, the way send_json would"""
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+
+def _epoch_ms(timestamp: str) -> int:
+    value = datetime.fromisoformat(timestamp)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp() * 1000)
+
+
+def encode_msgpack(message: Dict[str, Any]) -> bytes:
+    """
+    [type code, body, epoch ms] - the type string and ISO timestamp become
+    integers; the body is the rest of the message
+    """
+    body = dict(message)
+    code = TYPE_CODES.get(body.get("type"), 0)
+    if code:
+        del body["type"]
+    timestamp = body.pop("timestamp", None)
+    return msgpack.packb([code, body, _epoch_ms(timestamp) if timestamp else None])
+
+
+def transcode(text: str, codec: str) -> Frame:
+    """Frame for a codec from the JSON text every message is first encoded to"""
+    if codec == MSGPACK:
+        return encode_msgpack(json.loads(text))
+    return text
+
+
+def decode_frame(data: Frame) -> dict:
+    """Client frame to a message dict; MessagePack clients may send a dict or [code, body]"""
+    if isinstance(data, str):
+        return json.loads(data)
+
+    value = msgpack.unpackb(data)
+    if isinstance(value, (list, tuple)):
+        code, body = value[0], (value[1] if len(value) > 1 else None) or {}
+        if code:
+            body = {**body, "type": TYPE_NAMES.get(code)}
+        return body
+    if not isinstance(value, dict):
+        raise ValueError("Expected a map or [type code, body]")
+    return value
+
+
+async def receive_message(websocket, codec: str) -> dict:
+    """receive_json for either codec"""
+    if codec == MSGPACK:
+        return decode_frame(await websocket.receive_bytes())
+    return decode_frame(await websocket.receive_text())
@@ -0,0 +1,130 @@
+"""
+Connection registry memory benchmark
+Registers many idle websocket connections with ConnectionManager and reports
+the registry's memory per connection and the cost of join/leave/disconnect.
+
+Usage (from the backend directory):
+    python -m benchmarks.connection_registry_memory --connections 100000
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+# Add the backend directory to the path
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_dir))
+
+# The manager reads settings on import; benchmarks need no real secrets
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+os.environ.setdefault("RAZORPAY_KEY_ID", "benchmark")
+os.environ.setdefault("RAZORPAY_KEY_SECRET", "benchmark")
+os.environ.setdefault("ALLOWED_ORIGINS", "http://localhost")
+
+
+class IdleSocket:
+    """Stands in for an accepted WebSocket that never receives a frame"""
+
+    __slots__ = ()
+    scope = {}
+
+    async def accept(self, subprotocol=None):
+        pass
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Connection registry memory benchmark")
+    parser.add_argument("--connections", type=int, default=100000)
+    parser.add_argument("--rooms", type=int, default=1000)
+    parser.add_argument("--authenticated", type=float, default=0.3,
+                        help="Share of connections that belong to a user")
+    parser.add_argument("--output", default=None, help="Optional JSON report path")
+    return parser.parse_args()
+
+
+async def run(args) -> dict:
+    from app.services.websocket_manager import ConnectionManager
+
+    sockets = [IdleSocket() for _ in range(args.connections)]
+    users_every = max(1, int(1 / args.authenticated)) if args.authenticated > 0 else 0
+
+    tracemalloc.start()
+    baseline = tracemalloc.take_snapshot()
+    manager = ConnectionManager()
+
+    started = time.perf_counter()
+    connections = []
+    for i, websocket in enumerate(sockets):
+        # Every authenticated user keeps two sockets open (two tabs)
+        user_id = (i // 2) if users_every and i % users_every in (0, 1) else None
+        connections.append(await manager.connect(websocket, i % args.rooms, user_id))
+    connect_s = time.perf_counter() - started
+
+    snapshot = tracemalloc.take_snapshot()
+    registry_bytes = sum(stat.size_diff for stat in snapshot.compare_to(baseline, "filename"))
+    tracemalloc.stop()
+
+    # Re-join and leave a second room for every connection
+    started = time.perf_counter()
+    for connection in connections:
+        manager.join(connection, args.rooms)
+    for connection in connections:
+        manager.leave(connection, args.rooms)
+    join_leave_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for connection in connections:
+        manager.disconnect(connection)
+    disconnect_s = time.perf_counter() - started
+
+    return {
+        "benchmark": "connection_registry_memory",
+        "parameters": {
+            "connections": args.connections,
+            "rooms": args.rooms,
+            "authenticated": args.authenticated
+        },
+        "results": {
+            "registry_bytes": registry_bytes,
+            "bytes_per_connection": registry_bytes / args.connections,
+            "connect_us": connect_s / args.connections * 1e6,
+            "join_leave_us": join_leave_s / args.connections * 1e6,
+            "disconnect_us": disconnect_s / args.connections * 1e6,
+            "left_after_disconnect": manager.stats()
+        }
+    }
+
+
+def main():
+    args = parse_args()
+
+    # Silence the per-connection connect/disconnect logging
+    import builtins
+    real_print = builtins.print
+    builtins.print = lambda *a, **k: None
+    try:
+        report = asyncio.run(run(args))
+    finally:
+        builtins.print = real_print
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+
+    results = report["results"]
+    print("=" * 50)
+    print(f"Connections:          {args.connections} in {args.rooms} rooms")
+    print(f"Registry memory:      {results['registry_bytes'] / 1024 / 1024:.1f} MiB "
+          f"({results['bytes_per_connection']:.0f} bytes/connection)")
+    print(f"connect:              {results['connect_us']:.2f} µs")
+    print(f"join + leave:         {results['join_leave_us']:.2f} µs")
+    print(f"disconnect:           {results['disconnect_us']:.2f} µs")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
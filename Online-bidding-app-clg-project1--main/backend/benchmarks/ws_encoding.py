@@ -0,0 +1,210 @@
+"""
+WebSocket encoding benchmark
+Fans bids out to a room of in-memory sockets once per wire format and reports
+bytes per viewer, serialization and permessage-deflate CPU, and the size of
+conflated auction_delta updates against full auction_state updates.
+
+Usage (from the backend directory):
+    python -m benchmarks.ws_encoding --viewers 1000 --bids 2000
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+import zlib
+from pathlib import Path
+
+# Add the backend directory to the path
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_dir))
+
+# The manager reads settings on import; benchmarks need no real secrets
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+os.environ.setdefault("RAZORPAY_KEY_ID", "benchmark")
+os.environ.setdefault("RAZORPAY_KEY_SECRET", "benchmark")
+os.environ.setdefault("ALLOWED_ORIGINS", "http://localhost")
+
+PRODUCT_ID = 1
+
+
+class RecordingSocket:
+    """An accepted WebSocket that counts what it is sent"""
+
+    def __init__(self, subprotocols):
+        self.scope = {"subprotocols": subprotocols}
+        self.frames = 0
+        self.bytes = 0
+        self.sample = None
+
+    async def accept(self, subprotocol=None):
+        pass
+
+    async def send_text(self, text):
+        self._record(text.encode("utf-8"))
+
+    async def send_bytes(self, data):
+        self._record(data)
+
+    def _record(self, payload):
+        self.frames += 1
+        self.bytes += len(payload)
+        if self.sample is not None:
+            self.sample.append(payload)
+
+
+class PerMessageDeflate:
+    """permessage-deflate as browsers negotiate it: raw deflate with context takeover"""
+
+    def __init__(self):
+        self.compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+
+    def compress(self, payload: bytes) -> bytes:
+        data = self.compressor.compress(payload) + self.compressor.flush(zlib.Z_SYNC_FLUSH)
+        return data[:-4]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="WebSocket encoding benchmark")
+    parser.add_argument("--viewers", type=int, default=1000)
+    parser.add_argument("--bids", type=int, default=2000)
+    parser.add_argument("--output", default=None, help="Optional JSON report path")
+    return parser.parse_args()
+
+
+def bid_stream(count: int):
+    rng = random.Random(7)
+    names = [f"Buyer {i}" for i in range(50)]
+    amount = 1000.0
+    for bid_id in range(1, count + 1):
+        amount += 50
+        yield {
+            "amount": amount,
+            "buyer_name": rng.choice(names),
+            "product_id": PRODUCT_ID,
+            "bid_id": bid_id,
+            "is_proxy": rng.random() < 0.3
+        }
+
+
+def deflate_cost(payloads):
+    """(bytes, seconds) one viewer's socket spends compressing its stream"""
+    deflate = PerMessageDeflate()
+    started = time.perf_counter()
+    size = sum(len(deflate.compress(payload)) for payload in payloads)
+    return size, time.perf_counter() - started
+
+
+async def fan_out(subprotocols, args) -> dict:
+    """Broadcast every bid to a room of viewers speaking one codec"""
+    from app.services.websocket_manager import ConnectionManager
+
+    manager = ConnectionManager(send_queue_size=args.bids + 10)
+    sockets = [RecordingSocket(subprotocols) for _ in range(args.viewers)]
+    sockets[0].sample = []
+    for websocket in sockets:
+        await manager.connect(websocket, PRODUCT_ID)
+
+    started = time.perf_counter()
+    for bid in bid_stream(args.bids):
+        await manager.broadcast_new_bid(PRODUCT_ID, bid)
+    broadcast_s = time.perf_counter() - started
+    while any(c.task is not None for c in manager.connections.values()):
+        await asyncio.sleep(0)
+    total_s = time.perf_counter() - started
+
+    viewer = sockets[0]
+    deflated, deflate_s = deflate_cost(viewer.sample)
+    return {
+        "bytes_per_viewer": viewer.bytes,
+        "bytes_per_message": viewer.bytes / viewer.frames,
+        "deflated_bytes_per_viewer": deflated,
+        "broadcast_us_per_bid": broadcast_s / args.bids * 1e6,
+        "fan_out_us_per_frame": total_s / (args.bids * args.viewers) * 1e6,
+        "deflate_us_per_frame": deflate_s / viewer.frames * 1e6
+    }
+
+
+async def conflated(subprotocols, args, deltas: bool) -> dict:
+    """One flush per bid to a conflated viewer, as deltas or as full auction_state"""
+    from app.services.websocket_manager import ConnectionManager
+
+    manager = ConnectionManager(send_queue_size=args.bids + 10)
+    websocket = RecordingSocket(subprotocols)
+    websocket.sample = []
+    connection = await manager.connect(websocket, PRODUCT_ID, mode="conflated")
+
+    for bid in bid_stream(args.bids):
+        await manager.broadcast_new_bid(PRODUCT_ID, bid)
+        if not deltas:
+            # A socket that never synced is sent the full state
+            manager.summaries[PRODUCT_ID].synced.clear()
+        manager._flush_room(PRODUCT_ID)
+        while connection.task is not None:
+            await asyncio.sleep(0)
+
+    return {
+        "bytes_per_viewer": websocket.bytes,
+        "deflated_bytes_per_viewer": deflate_cost(websocket.sample)[0]
+    }
+
+
+def measure(args) -> dict:
+    codecs = {
+        "json": [],
+        "msgpack": ["bidding.msgpack.v1"]
+    }
+    results = {}
+    for name, subprotocols in codecs.items():
+        results[name] = asyncio.run(fan_out(subprotocols, args))
+    for name, subprotocols in codecs.items():
+        results[f"conflated_full_{name}"] = asyncio.run(conflated(subprotocols, args, False))
+        results[f"conflated_delta_{name}"] = asyncio.run(conflated(subprotocols, args, True))
+    return results
+
+
+def main():
+    args = parse_args()
+
+    # Silence the per-connection connect logging
+    import builtins
+    real_print = builtins.print
+    builtins.print = lambda *a, **k: None
+    try:
+        results = measure(args)
+    finally:
+        builtins.print = real_print
+
+    report = {
+        "benchmark": "ws_encoding",
+        "parameters": {"viewers": args.viewers, "bids": args.bids},
+        "results": results
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+
+    print("=" * 70)
+    print(f"{args.bids} bids to {args.viewers} viewers")
+    print(f"{'':32}{'json':>14}{'msgpack':>14}")
+    for label, key, fmt in (
+        ("bytes/message", "bytes_per_message", "{:.1f}"),
+        ("bytes/viewer", "bytes_per_viewer", "{:.0f}"),
+        ("deflated bytes/viewer", "deflated_bytes_per_viewer", "{:.0f}"),
+        ("broadcast µs/bid", "broadcast_us_per_bid", "{:.1f}"),
+        ("fan-out µs/frame", "fan_out_us_per_frame", "{:.2f}"),
+        ("deflate µs/frame", "deflate_us_per_frame", "{:.2f}"),
+    ):
+        row = [fmt.format(results[codec][key]) for codec in ("json", "msgpack")]
+        print(f"{label:32}{row[0]:>14}{row[1]:>14}")
+    for label, kind in (("conflated full state", "full"), ("conflated deltas", "delta")):
+        for key, suffix in (("bytes_per_viewer", ""), ("deflated_bytes_per_viewer", " (deflated)")):
+            row = [str(results[f"conflated_{kind}_{codec}"][key]) for codec in ("json", "msgpack")]
+            print(f"{label + suffix:32}{row[0]:>14}{row[1]:>14}")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
@@ -118,5 +118,78 @@ def migrate_database():
         print(f"   Remove-Item \"{DB_PATH}\"")
         raise
 
+def migrate_auction_columns():
+    """Add the denormalized leader columns to products, backfill them and add bid indexes"""
+    from sqlalchemy import inspect, text
+    from app.core.database import engine
+    
+    inspector = inspect(engine)
+    if "products" not in inspector.get_table_names():
+        print("❌ products table not found, it will be created when you start the server.")
+        return
+    
+    columns = [column["name"] for column in inspector.get_columns("products")]
+    indexes = [index["name"] for index in inspector.get_indexes("bids")]
+    
+    with engine.begin() as conn:
+        for column_name in ("leading_buyer_id", "leading_bid_id"):
+            if column_name not in columns:
+                conn.execute(text(f"ALTER TABLE products ADD COLUMN {column_name} INTEGER"))
+                print(f"✅ Added column: products.{column_name}")
+        
+        conn.execute(text("""
+            UPDATE products SET leading_bid_id = (
+                SELECT b.id FROM bids b
+                WHERE b.product_id = products.id
+                ORDER BY b.amount DESC, b.id DESC
+                LIMIT 1
+            )
+            WHERE leading_bid_id IS NULL
+        """))
+        conn.execute(text("""
+            UPDATE products SET leading_buyer_id = (
+                SELECT b.buyer_id FROM bids b WHERE b.id = products.leading_bid_id
+            )
+            WHERE leading_buyer_id IS NULL AND leading_bid_id IS NOT NULL
+        """))
+        print("✅ Backfilled auction leaders from bids")
+        
+        bid_indexes = {
+            "ix_bids_buyer_product_amount": "buyer_id, product_id, amount",
+            "ix_bids_product_timestamp_id": "product_id, timestamp, id"
+        }
+        for index_name, index_columns in bid_indexes.items():
+            if index_name not in indexes:
+                conn.execute(text(f"CREATE INDEX {index_name} ON bids ({index_columns})"))
+                print(f"✅ Created index on bids({index_columns})")
+
+
+def migrate_bid_idempotency():
+    """Add the idempotency key column and its unique index to bids"""
+    from sqlalchemy import inspect, text
+    from app.core.database import engine
+    
+    inspector = inspect(engine)
+    if "bids" not in inspector.get_table_names():
+        print("❌ bids table not found, it will be created when you start the server.")
+        return
+    
+    columns = [column["name"] for column in inspector.get_columns("bids")]
+    indexes = [index["name"] for index in inspector.get_indexes("bids")]
+    
+    with engine.begin() as conn:
+        if "idempotency_key" not in columns:
+            conn.execute(text("ALTER TABLE bids ADD COLUMN idempotency_key VARCHAR"))
+            print("✅ Added column: bids.idempotency_key")
+        
+        if "uq_bids_buyer_idempotency_key" not in indexes:
+            conn.execute(text(
+                "CREATE UNIQUE INDEX uq_bids_buyer_idempotency_key ON bids (buyer_id, idempotency_key)"
+            ))
+            print("✅ Created unique index on bids(buyer_id, idempotency_key)")
+
+
 if __name__ == "__main__":
-    migrate_database()
\ No newline at end of file
+    migrate_database()
+    migrate_auction_columns()
+    migrate_bid_idempotency()
\ No newline at end of file
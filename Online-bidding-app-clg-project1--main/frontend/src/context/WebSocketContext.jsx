@@ -40,6 +40,13 @@ export const WebSocketProvider = ({ children }) => {
       ws.onmessage = (event) => {
         try {
           const data = JSON.parse(event.data);
+
+          // Answer server heartbeats so the connection is not reaped as idle
+          if (data.type === 'ping') {
+            ws.send(JSON.stringify({ type: 'pong' }));
+            return;
+          }
+
           handleMessage(data);
         } catch (err) {
           console.error('Error parsing WebSocket message:', err);
@@ -58,7 +65,8 @@ export const WebSocketProvider = ({ children }) => {
         // Attempt to reconnect
         if (reconnectAttemptsRef.current < MAX_RECONNECT_ATTEMPTS) {
           reconnectAttemptsRef.current += 1;
-          const delay = Math.min(1000 * Math.pow(2, reconnectAttemptsRef.current), 30000);
+          // Full jitter spreads out clients that were all dropped at once (e.g. a deploy)
+          const delay = Math.round(Math.random() * Math.min(1000 * Math.pow(2, reconnectAttemptsRef.current), 30000));
           console.log(`Reconnecting in ${delay}ms... (Attempt ${reconnectAttemptsRef.current})`);
           
           reconnectTimeoutRef.current = setTimeout(() => {
@@ -5,8 +5,56 @@ class WebSocketManager {
     this.listeners = {}
     this.reconnectAttempts = 0
     this.maxReconnectAttempts = 5
-    this.reconnectDelay = 3000
+    this.reconnectDelay = 1000
+    this.maxReconnectDelay = 30000
     this.token = null
+    // Last room message seen per product: { [productId]: { stream, seq } }
+    this.roomPositions = {}
+    // Product rooms this socket follows; restored after every reconnect
+    this.subscriptions = new Set()
+  }
+
+  // Exponential backoff with full jitter, so clients dropped together (e.g. by a
+  // deploy) do not all reconnect in the same instant
+  nextReconnectDelay() {
+    const ceiling = Math.min(this.reconnectDelay * Math.pow(2, this.reconnectAttempts), this.maxReconnectDelay)
+    return Math.round(Math.random() * ceiling)
+  }
+
+  // Follow a product's bids on this one socket instead of opening /ws/auction/{id}.
+  // A known position resumes the room: the server replays only missed messages.
+  subscribe(productId) {
+    this.subscriptions.add(productId)
+    const position = this.roomPositions[productId]
+    this.sendRaw({ type: 'subscribe', product_id: productId, ...(position ? { stream: position.stream, last_seq: position.seq } : {}) })
+  }
+
+  unsubscribe(productId) {
+    this.subscriptions.delete(productId)
+    delete this.roomPositions[productId]
+    this.sendRaw({ type: 'unsubscribe', product_id: productId })
+  }
+
+  // Bid without an HTTP round trip; answered by a bid_ack or bid_rejected event
+  // carrying the same requestId (reused as the bid's Idempotency-Key)
+  placeBid(productId, amount, requestId = crypto.randomUUID()) {
+    this.sendRaw({ type: 'place_bid', product_id: productId, amount, request_id: requestId })
+    return requestId
+  }
+
+  sendRaw(message) {
+    if (this.ws && this.ws.readyState === WebSocket.OPEN) {
+      this.ws.send(JSON.stringify(message))
+    }
+  }
+
+  trackRoomPosition(data) {
+    if (data.product_id == null) return
+    if ((data.type === 'connected' || data.type === 'subscribed' || data.type === 'resync') && data.stream) {
+      this.roomPositions[data.product_id] = { stream: data.stream, seq: data.seq }
+    } else if (data.seq != null && this.roomPositions[data.product_id]) {
+      this.roomPositions[data.product_id].seq = data.seq
+    }
   }
 
   connect(token = null) {
@@ -31,13 +79,22 @@ class WebSocketManager {
       this.ws.onopen = () => {
         console.log('✅ WebSocket connected')
         this.reconnectAttempts = 0
+        this.subscriptions.forEach(productId => this.subscribe(productId))
         this.emit('connected', {})
       }
 
       this.ws.onmessage = (event) => {
         try {
           const data = JSON.parse(event.data)
+
+          // Answer server heartbeats so the connection is not reaped as idle
+          if (data.type === 'ping') {
+            this.ws.send(JSON.stringify({ type: 'pong' }))
+            return
+          }
+
           console.log('📨 WebSocket message received:', data)
+          this.trackRoomPosition(data)
           
           // Emit event to all registered listeners
           if (data.type) {
@@ -59,9 +116,10 @@ class WebSocketManager {
         
         // Attempt to reconnect
         if (this.reconnectAttempts < this.maxReconnectAttempts) {
+          const delay = this.nextReconnectDelay()
           this.reconnectAttempts++
-          console.log(`Attempting to reconnect (${this.reconnectAttempts}/${this.maxReconnectAttempts})...`)
-          setTimeout(() => this.connect(this.token), this.reconnectDelay)
+          console.log(`Attempting to reconnect in ${delay}ms (${this.reconnectAttempts}/${this.maxReconnectAttempts})...`)
+          setTimeout(() => this.connect(this.token), delay)
         }
       }
     } catch (error) {